@@ -0,0 +1,131 @@
+"""Benchmark das 15 consultas do catálogo em várias escalas de dados.
+
+Para cada escala o banco é repovoado pelo gerador_dados.py e cada consulta
+roda algumas vezes (depois de uma execução de aquecimento) pelo mesmo caminho
+de prepared statements da CLI. O resultado vai para um JSON que pode ser
+comparado com o de outra versão via --comparar.
+
+Uso:
+    python benchmark_vendas.py --escalas 10000 100000 1000000 --saida bench.json
+    python benchmark_vendas.py --escalas 10000 --comparar bench_anterior.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import psycopg2
+
+from config import DB_CONFIG
+from consultas import CONSULTAS, executar_preparada
+from gerador_dados import popular
+
+ESCALAS_PADRAO = [10_000, 100_000, 1_000_000]
+REPETICOES_PADRAO = 5
+
+
+def _versao_codigo() -> str:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecida"
+
+
+def medir_consultas(conexao, repeticoes: int) -> dict[str, dict]:
+    resultados = {}
+    for consulta in CONSULTAS.values():
+        valores = consulta.valores()
+        _, linhas = executar_preparada(conexao, consulta, valores)
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            executar_preparada(conexao, consulta, valores)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        resultados[consulta.nome] = {
+            "linhas": len(linhas),
+            "min_ms": min(tempos),
+            "mediana_ms": statistics.median(tempos),
+            "media_ms": statistics.fmean(tempos),
+            "max_ms": max(tempos),
+        }
+        print(f"  {consulta.nome:<40} {resultados[consulta.nome]['mediana_ms']:>10.2f} ms  {len(linhas)} linha(s)")
+    return resultados
+
+
+def executar_benchmark(escalas: list[int], repeticoes: int, semente: int) -> dict:
+    conexao = psycopg2.connect(**DB_CONFIG)
+    conexao.autocommit = True
+    try:
+        with conexao.cursor() as cursor:
+            cursor.execute("SHOW server_version;")
+            versao_postgres = cursor.fetchone()[0]
+        relatorio = {
+            "gerado_em": datetime.now().isoformat(timespec="seconds"),
+            "versao_codigo": _versao_codigo(),
+            "versao_postgres": versao_postgres,
+            "repeticoes": repeticoes,
+            "semente": semente,
+            "escalas": [],
+        }
+        for pedidos in escalas:
+            print(f"Escala: {pedidos} pedidos")
+            carga = popular(conexao, pedidos, semente)
+            # os planos preparados foram feitos para a escala anterior
+            with conexao.cursor() as cursor:
+                cursor.execute("DEALLOCATE ALL;")
+            relatorio["escalas"].append({**carga, "consultas": medir_consultas(conexao, repeticoes)})
+        return relatorio
+    finally:
+        conexao.close()
+
+
+def comparar_relatorios(atual: dict, anterior: dict) -> None:
+    """Mostra a razão entre as medianas de cada consulta nas escalas presentes nos dois relatórios"""
+    anteriores = {escala["pedidos"]: escala["consultas"] for escala in anterior["escalas"]}
+    print(f"Comparação com {anterior.get('versao_codigo', '?')} (>1 = mais lento agora)")
+    for escala in atual["escalas"]:
+        base = anteriores.get(escala["pedidos"])
+        if base is None:
+            continue
+        print(f"Escala: {escala['pedidos']} pedidos")
+        for nome, medida in escala["consultas"].items():
+            if nome in base and base[nome]["mediana_ms"] > 0:
+                razao = medida["mediana_ms"] / base[nome]["mediana_ms"]
+                print(f"  {nome:<40} {base[nome]['mediana_ms']:>10.2f} -> {medida['mediana_ms']:>10.2f} ms  ({razao:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das consultas do Sistema de Vendas")
+    parser.add_argument("--escalas", type=int, nargs="+", default=ESCALAS_PADRAO,
+                        help="quantidades de pedidos a gerar (uma rodada por escala)")
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES_PADRAO,
+                        help="execuções medidas de cada consulta por escala")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", default="benchmark_vendas.json", help="arquivo JSON do relatório")
+    parser.add_argument("--comparar", help="relatório JSON de outra versão para comparar")
+    args = parser.parse_args()
+
+    try:
+        relatorio = executar_benchmark(args.escalas, args.repeticoes, args.semente)
+    except psycopg2.Error as e:
+        print(f"Erro durante o benchmark: {e}")
+        sys.exit(1)
+
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    print(f"Relatório gravado em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar_relatorios(relatorio, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Carga de fixtures CSV com COPY, para recriar a base de testes rapidamente.
+
+O diretório tem um CSV por tabela, com nome NN_tabela.csv (NN dá a ordem)
+e cabeçalho com as colunas. Colunas geradas, como itens_pedido.subtotal, ficam de fora.
+Também pode ter um pre_carga.sql, que roda antes do COPY, e um pos_carga.sql,
+que roda depois. Tudo acontece numa única transação:
+
+1. TRUNCATE das tabelas com RESTART IDENTITY CASCADE. Tabelas que dependem
+   delas, como os resumos da atividade 1, também são esvaziadas; o
+   pos_carga.sql as recalcula.
+2. Remoção das chaves estrangeiras e dos índices secundários das tabelas, e
+   desligamento dos triggers de usuário.
+3. COPY de cada arquivo. Tabelas comuns usam FREEZE, porque acabaram de ser
+   truncadas na mesma transação.
+4. Recriação dos índices e das chaves estrangeiras. Cada FK é validada uma
+   vez, sobre a tabela inteira, em vez de linha a linha. Depois os triggers
+   são religados, os SERIAL são ajustados para MAX(id) + 1, o pos_carga.sql
+   roda e as tabelas passam por ANALYZE.
+
+Uso:
+    python carregar_fixtures.py fixtures
+    python carregar_fixtures.py ../atividade-2-padb/fixtures
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import psycopg2
+from psycopg2 import sql
+
+from config import DB_CONFIG
+
+_ARQUIVO_FIXTURE = re.compile(r"^(\d+)_(\w+)\.csv$")
+PRE_CARGA = "pre_carga.sql"
+POS_CARGA = "pos_carga.sql"
+
+
+def listar_fixtures(diretorio: str) -> list[tuple[str, str]]:
+    """(tabela, caminho) na ordem do prefixo numérico"""
+    arquivos = []
+    for nome in os.listdir(diretorio):
+        encontrado = _ARQUIVO_FIXTURE.match(nome)
+        if encontrado:
+            arquivos.append((int(encontrado.group(1)), encontrado.group(2), os.path.join(diretorio, nome)))
+    if not arquivos:
+        raise ValueError(f"Nenhum arquivo NN_tabela.csv em {diretorio}")
+    return [(tabela, caminho) for _, tabela, caminho in sorted(arquivos)]
+
+
+def _executar_arquivo(cursor, caminho: str) -> None:
+    if os.path.exists(caminho):
+        with open(caminho, encoding="utf-8") as arquivo:
+            cursor.execute(arquivo.read())
+
+
+def _chaves_estrangeiras(cursor, tabelas: list[str]) -> list[tuple[str, str, str]]:
+    """(tabela, nome, definição) das FKs declaradas nas tabelas; as cópias que o
+    PostgreSQL cria em cada partição (conparentid <> 0) somem junto com a do pai"""
+    cursor.execute(
+        "SELECT c.relname, k.conname, pg_get_constraintdef(k.oid) FROM pg_constraint k "
+        "JOIN pg_class c ON c.oid = k.conrelid "
+        "WHERE k.contype = 'f' AND k.conparentid = 0 AND k.conrelid = ANY(%s::regclass[]);",
+        (tabelas,),
+    )
+    return cursor.fetchall()
+
+
+def _indices_secundarios(cursor, tabelas: list[str]) -> list[tuple[str, str]]:
+    """(nome, CREATE INDEX) dos índices que não sustentam PK/UNIQUE; os das partições
+    são recriados pelo índice da tabela particionada"""
+    cursor.execute(
+        "SELECT c.relname, pg_get_indexdef(i.indexrelid) FROM pg_index i "
+        "JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE i.indrelid = ANY(%s::regclass[]) AND NOT c.relispartition "
+        "AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conindid = i.indexrelid);",
+        (tabelas,),
+    )
+    # no índice de tabela particionada a definição vem com ON ONLY, que não desce para as partições
+    return [(nome, definicao.replace(" ON ONLY ", " ON ", 1)) for nome, definicao in cursor.fetchall()]
+
+
+def _ajustar_sequencias(cursor, tabelas: list[str]) -> None:
+    cursor.execute(
+        "SELECT c.relname, a.attname FROM pg_attribute a JOIN pg_class c ON c.oid = a.attrelid "
+        "WHERE a.attrelid = ANY(%s::regclass[]) AND a.attnum > 0 AND NOT a.attisdropped "
+        "AND pg_get_serial_sequence(quote_ident(c.relname), a.attname) IS NOT NULL;",
+        (tabelas,),
+    )
+    for tabela, coluna in cursor.fetchall():
+        cursor.execute(
+            sql.SQL("SELECT setval(pg_get_serial_sequence(quote_ident(%s), %s), "
+                    "COALESCE((SELECT MAX({c}) FROM {t}), 0) + 1, false);")
+            .format(c=sql.Identifier(coluna), t=sql.Identifier(tabela)),
+            (tabela, coluna),
+        )
+
+
+def carregar(conexao, diretorio: str) -> dict:
+    fixtures = listar_fixtures(diretorio)
+    tabelas = [tabela for tabela, _ in fixtures]
+    identificadores = sql.SQL(", ").join(map(sql.Identifier, tabelas))
+    tempos = {}
+    linhas = {}
+    autocommit = conexao.autocommit
+    conexao.autocommit = False
+    try:
+        with conexao.cursor() as cursor:
+            inicio = time.perf_counter()
+            cursor.execute(sql.SQL("TRUNCATE {} RESTART IDENTITY CASCADE;").format(identificadores))
+            _executar_arquivo(cursor, os.path.join(diretorio, PRE_CARGA))
+            chaves = _chaves_estrangeiras(cursor, tabelas)
+            indices = _indices_secundarios(cursor, tabelas)
+            for tabela, nome, _ in chaves:
+                cursor.execute(sql.SQL("ALTER TABLE {} DROP CONSTRAINT {};")
+                               .format(sql.Identifier(tabela), sql.Identifier(nome)))
+            for nome, _ in indices:
+                cursor.execute(sql.SQL("DROP INDEX {};").format(sql.Identifier(nome)))
+            for tabela in tabelas:
+                cursor.execute(sql.SQL("ALTER TABLE {} DISABLE TRIGGER USER;").format(sql.Identifier(tabela)))
+            cursor.execute("SELECT relname FROM pg_class WHERE oid = ANY(%s::regclass[]) AND relkind = 'p';",
+                           (tabelas,))
+            particionadas = {nome for (nome,) in cursor.fetchall()}
+            tempos["preparacao"] = time.perf_counter() - inicio
+
+            for tabela, caminho in fixtures:
+                inicio = time.perf_counter()
+                with open(caminho, encoding="utf-8") as arquivo:
+                    colunas = arquivo.readline().strip().split(",")
+                    # FREEZE grava as linhas já congeladas, mas não é aceito em tabela particionada
+                    opcoes = "FORMAT csv" if tabela in particionadas else "FORMAT csv, FREEZE"
+                    comando = sql.SQL("COPY {} ({}) FROM STDIN WITH ({})").format(
+                        sql.Identifier(tabela), sql.SQL(", ").join(map(sql.Identifier, colunas)), sql.SQL(opcoes))
+                    cursor.copy_expert(comando.as_string(cursor), arquivo)
+                linhas[tabela] = cursor.rowcount
+                tempos[tabela] = time.perf_counter() - inicio
+                print(f"{tabela:<20} {cursor.rowcount:>12} linha(s) em {tempos[tabela]:.2f} s")
+
+            inicio = time.perf_counter()
+            for _, definicao in indices:
+                cursor.execute(definicao)
+            tempos["indices"] = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            for tabela, nome, definicao in chaves:
+                cursor.execute(sql.SQL("ALTER TABLE {} ADD CONSTRAINT {} {};")
+                               .format(sql.Identifier(tabela), sql.Identifier(nome), sql.SQL(definicao)))
+            tempos["chaves_estrangeiras"] = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            for tabela in tabelas:
+                cursor.execute(sql.SQL("ALTER TABLE {} ENABLE TRIGGER USER;").format(sql.Identifier(tabela)))
+            _ajustar_sequencias(cursor, tabelas)
+            _executar_arquivo(cursor, os.path.join(diretorio, POS_CARGA))
+            cursor.execute(sql.SQL("ANALYZE {};").format(identificadores))
+            tempos["pos_carga"] = time.perf_counter() - inicio
+        conexao.commit()
+    except BaseException:
+        conexao.rollback()
+        raise
+    finally:
+        conexao.autocommit = autocommit
+    print(f"{len(indices)} índice(s) recriado(s) em {tempos['indices']:.2f} s, "
+          f"{len(chaves)} chave(s) estrangeira(s) validada(s) em {tempos['chaves_estrangeiras']:.2f} s, "
+          f"pós-carga e ANALYZE em {tempos['pos_carga']:.2f} s")
+    return {"linhas": linhas, "tempos_s": tempos}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carrega um diretório de fixtures CSV com COPY")
+    parser.add_argument("diretorio", help="diretório com os arquivos NN_tabela.csv")
+    args = parser.parse_args()
+
+    try:
+        conexao = psycopg2.connect(**DB_CONFIG)
+    except psycopg2.Error as e:
+        print(f"Erro ao conectar ao PostgreSQL: {e}")
+        sys.exit(1)
+    try:
+        inicio = time.perf_counter()
+        carregar(conexao, args.diretorio)
+        print(f"Carga concluída em {time.perf_counter() - inicio:.2f} s")
+    except (ValueError, OSError, psycopg2.Error) as e:
+        print(f"Erro ao carregar as fixtures: {e}")
+        sys.exit(1)
+    finally:
+        conexao.close()
+
+
+if __name__ == "__main__":
+    main()
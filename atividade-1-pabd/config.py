@@ -0,0 +1,6 @@
+DB_CONFIG = {
+    'host': '127.0.0.1',
+    'user': 'postgres',
+    'password': 'postgres',
+    'database': 'postgres'
+}
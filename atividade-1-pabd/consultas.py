@@ -0,0 +1,359 @@
+"""Catálogo das consultas do Sistema de Vendas.
+
+Cada relatório é descrito uma única vez aqui: o SQL (com parâmetros nomeados
+no formato do psycopg2), os parâmetros aceitos e os textos exibidos. O menu,
+as flags da linha de comando e o modo lote são todos gerados a partir de
+CONSULTAS.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+import psycopg2.errors
+
+_PLACEHOLDER = re.compile(r"%\((\w+)\)s")
+# primeira palavra do SQL (SELECT/WITH), onde entra o comentário com o nome da consulta
+_PRIMEIRA_PALAVRA = re.compile(r"^\s*(\w+)")
+
+
+@dataclass(frozen=True)
+class Parametro:
+    nome: str
+    tipo: str  # tipo SQL usado no PREPARE
+    padrao: Any
+    descricao: str
+    conversor: Callable[[str], Any] = str
+
+    @property
+    def opcional(self) -> bool:
+        return self.padrao is None
+
+    def converter(self, valor: Any) -> Any:
+        if isinstance(valor, str):
+            if not valor and self.opcional:
+                return None
+            return self.conversor(valor)
+        return valor
+
+
+@dataclass(frozen=True)
+class Consulta:
+    numero: int
+    nome: str
+    titulo: str  # texto curto do menu
+    descricao: str  # cabeçalho do resultado
+    sql: str
+    parametros: tuple[Parametro, ...] = ()
+    # tabelas lidas pela consulta; usadas para invalidar o cache quando mudam
+    tabelas: frozenset[str] = field(default_factory=frozenset)
+    # índices do setup.sql que o plano da consulta deve usar (verificar_indices.py)
+    indices: tuple[str, ...] = ()
+
+    def __post_init__(self):
+        # o comentário fica logo depois do SELECT para sobreviver ao PREPARE, ao COPY e ao
+        # EXPLAIN; é por ele que o pg_stat_statements liga a query à consulta do catálogo
+        object.__setattr__(self, "sql", _PRIMEIRA_PALAVRA.sub(rf"\1 {self.marcador}", self.sql, count=1))
+
+    @property
+    def nome_preparado(self) -> str:
+        return f"consulta_{self.numero:02d}"
+
+    @property
+    def marcador(self) -> str:
+        return f"/* {self.nome_preparado} */"
+
+    def valores(self, **parametros: Any) -> dict[str, Any]:
+        """Completa os parâmetros informados com os valores padrão e converte os tipos"""
+        desconhecidos = set(parametros) - {p.nome for p in self.parametros}
+        if desconhecidos:
+            raise ValueError(f"Parâmetro(s) desconhecido(s) para a consulta {self.numero}: {', '.join(sorted(desconhecidos))}")
+        return {
+            p.nome: p.converter(parametros[p.nome]) if p.nome in parametros else p.padrao
+            for p in self.parametros
+        }
+
+    def cabecalho(self, valores: dict[str, Any]) -> str:
+        # parâmetro opcional vazio aparece no cabeçalho como "sem limite"
+        exibidos = {nome: "sem limite" if valor is None else valor for nome, valor in valores.items()}
+        return self.descricao.format(**exibidos)
+
+    def sql_prepare(self) -> str:
+        """PREPARE com os parâmetros nomeados trocados por $1, $2, ..."""
+        posicoes = {p.nome: i for i, p in enumerate(self.parametros, start=1)}
+        corpo = _PLACEHOLDER.sub(lambda m: f"${posicoes[m.group(1)]}", self.sql)
+        corpo = corpo.replace("%%", "%").strip().rstrip(";")
+        if not self.parametros:
+            return f"PREPARE {self.nome_preparado} AS {corpo}"
+        tipos = ", ".join(p.tipo for p in self.parametros)
+        return f"PREPARE {self.nome_preparado} ({tipos}) AS {corpo}"
+
+    def sql_execute(self) -> str:
+        if not self.parametros:
+            return f"EXECUTE {self.nome_preparado}"
+        marcadores = ", ".join(f"%({p.nome})s" for p in self.parametros)
+        return f"EXECUTE {self.nome_preparado} ({marcadores})"
+
+
+CONSULTAS: dict[int, Consulta] = {c.numero: c for c in (
+    Consulta(
+        1, "consulta_01_usuarios_ativos",
+        "Listagem de Usuários Ativos",
+        "1. Listagem de Usuários Ativos",
+        """
+        SELECT id_usuario, nome, email, telefone
+        FROM usuario
+        WHERE ativo = TRUE;
+        """,
+        tabelas=frozenset({"usuario"}),
+    ),
+    Consulta(
+        2, "consulta_02_produtos_categoria",
+        "Catálogo de Produtos por Categoria",
+        "2. Listagem de Produtos da Categoria {categoria}",
+        """
+        SELECT nome, preco, quantidade_estoque
+        FROM produto
+        WHERE categoria = %(categoria)s
+        ORDER BY preco ASC;
+        """,
+        (Parametro("categoria", "varchar", "Informática", "Categoria"),),
+        tabelas=frozenset({"produto"}),
+        indices=("idx_produto_categoria_preco",),
+    ),
+    Consulta(
+        3, "consulta_03_pedidos_status",
+        "Contagem de Pedidos por Status",
+        "3. Quantidade de Pedidos para cada Status Diferente",
+        """
+        SELECT status_pedido, COUNT(*) AS quantidade_pedidos
+        FROM pedido
+        GROUP BY status_pedido;
+        """,
+        tabelas=frozenset({"pedido"}),
+        indices=("idx_pedido_status",),
+    ),
+    Consulta(
+        4, "consulta_04_estoque_baixo",
+        "Alerta de Estoque Baixo",
+        "4. Listagem de Produtos com Quantidade em Estoque Menor que {limite} Unidades",
+        """
+        SELECT nome, quantidade_estoque, categoria
+        FROM produto
+        WHERE quantidade_estoque < %(limite)s;
+        """,
+        (Parametro("limite", "integer", 30, "Estoque mínimo", int),),
+        tabelas=frozenset({"produto"}),
+        indices=("idx_produto_estoque",),
+    ),
+    # pedido é particionado por mês: com o corte calculado a partir do CURRENT_DATE
+    # o PostgreSQL descarta na execução as partições antigas e lê só os últimos meses
+    Consulta(
+        5, "consulta_05_pedidos_recentes",
+        "Histórico de Pedidos Recentes",
+        "5. Listagem de Pedidos Realizados nos Últimos {dias} Dias",
+        """
+        SELECT id_pedido, TO_CHAR(data_pedido, 'DD-MM-YYYY') AS data_pedido, valor_total, status_pedido
+        FROM pedido
+        WHERE data_pedido >= CURRENT_DATE - make_interval(days => %(dias)s);
+        """,
+        (Parametro("dias", "integer", 60, "Quantidade de dias", int),),
+        tabelas=frozenset({"pedido"}),
+    ),
+    # O PARTITION BY vai criar novas tabelinhas com base na categoria
+    # cada uma dessas tabelinhas vai ser ordenada (ORDER BY) pelo preco, deixando o mais caro no topo
+    # o ROW_NUMBER() OVER vai colocar especies de ranks, que vão ser chamados de posicao
+    # com o WHERE posicao = 1, a gente pega os primeiros ranks
+    #
+    # como so tem 1 primeiro rank por categoria, e os primeiros ranks sao os mais caros
+    # ele seleciona o mais caro de cada categoria
+    Consulta(
+        6, "consulta_06_produtos_caros_categoria",
+        "Produtos Mais Caros por Categoria",
+        "6. Listagem de Produto Mais Caro da Categoria",
+        """
+        SELECT nome, preco
+        FROM (
+            SELECT nome, preco,
+                ROW_NUMBER() OVER (PARTITION BY categoria ORDER BY preco DESC) AS posicao
+            FROM produto
+        ) sub
+        WHERE posicao = 1;
+        """,
+        tabelas=frozenset({"produto"}),
+        indices=("idx_produto_categoria_preco",),
+    ),
+    Consulta(
+        7, "consulta_07_contatos_incompletos",
+        "Clientes com Dados Incompletos",
+        "7. Listagem de Usuários Ativos que não Possuem Telefone Cadastrado",
+        """
+        SELECT *
+        FROM usuario
+        WHERE ativo = TRUE AND telefone IS NULL;
+        """,
+        tabelas=frozenset({"usuario"}),
+        indices=("idx_usuario_ativos_sem_telefone",),
+    ),
+    Consulta(
+        8, "consulta_08_pedidos_enviados",
+        "Pedidos Pendentes de Entrega",
+        "8. Listagem de Pedidos com Status '{status}'",
+        """
+        SELECT
+            u.nome AS nome_usuario,
+            u.email AS email_usuario,
+            u.telefone AS telefone_usuario,
+            p.endereco_entrega
+        FROM pedido p
+        JOIN usuario u ON p.id_usuario = u.id_usuario
+        WHERE p.status_pedido = %(status)s;
+        """,
+        (Parametro("status", "status_pedido_enum", "enviado", "Status do pedido"),),
+        tabelas=frozenset({"pedido", "usuario"}),
+        indices=("idx_pedido_status",),
+    ),
+    Consulta(
+        9, "consulta_09_detalhamento_pedido",
+        "Detalhamento Completo de Pedidos",
+        "9. Listagem de Todas as Informações de um Pedido",
+        """
+        SELECT
+            u.nome AS nome_cliente,
+            u.email AS email_cliente,
+            u.telefone AS telefone_cliente,
+            pr.nome AS produto_comprado,
+            ip.quantidade,
+            ip.preco_unitario,
+            ip.subtotal
+        FROM pedido p
+        JOIN usuario u ON p.id_usuario = u.id_usuario
+        JOIN itens_pedido ip ON ip.id_pedido = p.id_pedido AND ip.data_pedido = p.data_pedido
+        JOIN produto pr ON ip.id_produto = pr.id_produto;
+        """,
+        tabelas=frozenset({"pedido", "usuario", "itens_pedido", "produto"}),
+    ),
+    Consulta(
+        10, "consulta_10_ranking_produtos",
+        "Ranking dos Produtos Mais Vendidos",
+        "10. Listagem de Produtos Ordenado pela Quantidade Total Vendida",
+        """
+        SELECT p.nome, p.categoria, SUM(vp.total_vendido) AS total_vendido
+        FROM vendas_produto vp
+        JOIN produto p ON p.id_produto = vp.id_produto
+        WHERE vp.total_vendido > 0
+        GROUP BY p.nome, p.categoria
+        ORDER BY total_vendido DESC;
+        """,
+        tabelas=frozenset({"produto", "itens_pedido"}),
+    ),
+    # NOT EXISTS vira um anti-join: para cada cliente basta achar um pedido no período.
+    # Sem janela (dias vazio) o "IS NULL OR" some no planejamento e sobra "nunca comprou"
+    Consulta(
+        11, "consulta_11_clientes_sem_compras",
+        "Análise de Clientes Sem Compras",
+        "11. Listagem de Usuários Ativos sem Pedidos nos Últimos Dias (dias: {dias})",
+        """
+        SELECT u.id_usuario, u.nome, u.email, u.telefone
+        FROM usuario u
+        WHERE u.ativo = TRUE
+            AND NOT EXISTS (
+                SELECT 1
+                FROM pedido p
+                WHERE p.id_usuario = u.id_usuario
+                    AND (%(dias)s::integer IS NULL OR p.data_pedido >= CURRENT_DATE - make_interval(days => %(dias)s))
+            );
+        """,
+        (Parametro("dias", "integer", None, "Dias sem comprar (vazio = nunca comprou)", int),),
+        tabelas=frozenset({"usuario", "pedido"}),
+        indices=("idx_pedido_usuario_data",),
+    ),
+    # usuario_estatisticas é mantida pelos triggers de pedido (setup.sql); agrupar por id
+    # em vez de por nome evita somar clientes homônimos. Pedidos cancelados não entram.
+    Consulta(
+        12, "consulta_12_estatisticas_cliente",
+        "Estatísticas de Compras por Cliente",
+        "12. Listagem de Número Total de Pedidos, Valor Médio por Pedido e Valor Total Gasto",
+        """
+        SELECT u.nome,
+            ue.quantidade_pedidos,
+            ue.valor_total_gasto / ue.quantidade_pedidos AS valor_medio_por_pedido,
+            ue.valor_total_gasto
+        FROM usuario_estatisticas ue
+        JOIN usuario u ON u.id_usuario = ue.id_usuario
+        WHERE ue.quantidade_pedidos > 0
+        ORDER BY ue.valor_total_gasto DESC;
+        """,
+        tabelas=frozenset({"usuario", "pedido"}),
+    ),
+    Consulta(
+        13, "consulta_13_relatorio_mensal",
+        "Relatório Mensal de Vendas",
+        "13. Listagem de Vendas por Mês/Ano",
+        """
+        SELECT TO_CHAR(periodo, 'YYYY-MM') AS periodo,
+            total_pedidos,
+            produtos_diferentes AS produtos_diferentes_vendidos,
+            faturamento_total
+        FROM vendas_mensais
+        WHERE total_pedidos > 0
+        ORDER BY vendas_mensais.periodo;
+        """,
+        tabelas=frozenset({"pedido", "itens_pedido"}),
+    ),
+    Consulta(
+        14, "consulta_14_produtos_nao_vendidos",
+        "Produtos que Nunca Foram Vendidos",
+        "14. Listagem de Produtos Ativos sem Vendas nos Últimos Dias (dias: {dias})",
+        """
+        SELECT pr.id_produto, pr.nome
+        FROM produto pr
+        WHERE pr.ativo = TRUE
+            AND NOT EXISTS (
+                SELECT 1
+                FROM itens_pedido ip
+                WHERE ip.id_produto = pr.id_produto
+                    AND (%(dias)s::integer IS NULL OR ip.data_pedido >= CURRENT_DATE - make_interval(days => %(dias)s))
+            );
+        """,
+        (Parametro("dias", "integer", None, "Dias sem vender (vazio = nunca vendido)", int),),
+        tabelas=frozenset({"produto", "itens_pedido"}),
+        indices=("idx_itens_pedido_produto",),
+    ),
+    Consulta(
+        15, "consulta_15_ticket_medio_categoria",
+        "Análise de Ticket Médio por Categoria",
+        "15. Listagem de Ticket Médio para Cada Categoria de Produto",
+        """
+        SELECT p.categoria, AVG(ip.subtotal) AS ticket_medio
+        FROM produto p
+        JOIN itens_pedido ip ON ip.id_produto = p.id_produto
+        JOIN pedido pe ON pe.id_pedido = ip.id_pedido AND pe.data_pedido = ip.data_pedido
+        WHERE pe.status_pedido != 'cancelado'
+        GROUP BY p.categoria;
+        """,
+        tabelas=frozenset({"produto", "itens_pedido", "pedido"}),
+    ),
+)}
+
+
+def buscar_consulta(numero: int) -> Consulta:
+    try:
+        return CONSULTAS[numero]
+    except KeyError:
+        raise ValueError(f"Consulta {numero} não existe no catálogo") from None
+
+
+def executar_preparada(conexao, consulta: Consulta, valores: dict[str, Any]) -> tuple[list[str], list[tuple]]:
+    """Executa a consulta como prepared statement da conexão.
+    O PREPARE só é enviado na primeira vez; depois disso o servidor reaproveita
+    o parse/plano e recebe apenas os parâmetros"""
+    with conexao.cursor() as cursor:
+        try:
+            cursor.execute(consulta.sql_execute(), valores)
+        except psycopg2.errors.InvalidSqlStatementName:
+            cursor.execute(consulta.sql_prepare())
+            cursor.execute(consulta.sql_execute(), valores)
+        if cursor.description:
+            colunas = [desc[0] for desc in cursor.description]
+            return colunas, cursor.fetchall()
+        return [], []
@@ -0,0 +1,84 @@
+"""Painel do pg_stat_statements para as consultas do catálogo.
+
+Cada SQL de consultas.py leva o comentário /* consulta_NN */ logo depois do
+SELECT; o pg_stat_statements guarda o texto da primeira execução de cada
+query normalizada, então o comentário aparece na coluna query e liga a
+estatística de volta à Consulta. O application_name da CLI não serve para
+isso porque a view não registra quem executou.
+
+A extensão só coleta se estiver em shared_preload_libraries (ver o
+docker-compose.yml); o CREATE EXTENSION é feito aqui sob demanda.
+"""
+import re
+from typing import Any, Optional
+
+import psycopg2.errors
+
+from consultas import CONSULTAS
+
+# coluna da view -> direção; a taxa de hit mais baixa é a que interessa, então essa sobe
+ORDENACOES = {
+    "total": "total_exec_time DESC",
+    "media": "mean_exec_time DESC",
+    "chamadas": "calls DESC",
+    "hit": "taxa_hit ASC NULLS LAST",
+}
+LIMITE_PADRAO = 15
+
+ERRO_NAO_CARREGADO = ("O pg_stat_statements não está carregado; suba o PostgreSQL com "
+                      "shared_preload_libraries=pg_stat_statements")
+
+_MARCADOR = re.compile(r"/\* consulta_(\d+) \*/")
+
+SQL_ESTATISTICAS = """
+    SELECT query, calls, total_exec_time, mean_exec_time, rows,
+           shared_blks_hit, shared_blks_read,
+           shared_blks_hit::float / NULLIF(shared_blks_hit + shared_blks_read, 0) AS taxa_hit
+    FROM pg_stat_statements
+    WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+      AND (NOT %(apenas_catalogo)s OR query LIKE '%%/* consulta\\_%%')
+    ORDER BY {ordem}
+    LIMIT %(limite)s;
+"""
+
+
+def habilitar(conexao) -> None:
+    with conexao.cursor() as cursor:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_stat_statements;")
+
+
+def consulta_da_query(query: str) -> Optional[str]:
+    """Nome da consulta do catálogo que gerou a query, pelo comentário /* consulta_NN */"""
+    marcador = _MARCADOR.search(query)
+    if marcador is None:
+        return None
+    consulta = CONSULTAS.get(int(marcador.group(1)))
+    return consulta.nome if consulta else None
+
+
+def ler_estatisticas(conexao, ordem: str = "total", limite: int = LIMITE_PADRAO,
+                     apenas_catalogo: bool = True) -> list[dict[str, Any]]:
+    if ordem not in ORDENACOES:
+        raise ValueError(f"Ordenação {ordem} inválida; use {', '.join(ORDENACOES)}")
+    habilitar(conexao)
+    try:
+        with conexao.cursor() as cursor:
+            cursor.execute(SQL_ESTATISTICAS.format(ordem=ORDENACOES[ordem]),
+                           {"apenas_catalogo": apenas_catalogo, "limite": limite})
+            colunas = [desc[0] for desc in cursor.description]
+            linhas = [dict(zip(colunas, linha)) for linha in cursor.fetchall()]
+    except psycopg2.errors.ObjectNotInPrerequisiteState as e:
+        raise RuntimeError(ERRO_NAO_CARREGADO) from e
+    for linha in linhas:
+        linha["consulta"] = consulta_da_query(linha["query"])
+    return linhas
+
+
+def resetar(conexao) -> None:
+    """Zera as estatísticas (por exemplo entre duas rodadas do benchmark)"""
+    habilitar(conexao)
+    try:
+        with conexao.cursor() as cursor:
+            cursor.execute("SELECT pg_stat_statements_reset();")
+    except psycopg2.errors.ObjectNotInPrerequisiteState as e:
+        raise RuntimeError(ERRO_NAO_CARREGADO) from e
@@ -0,0 +1,110 @@
+"""Exportação das consultas do catálogo para arquivo.
+
+CSV e NDJSON saem direto do servidor por COPY (query) TO STDOUT: o psycopg2
+grava os bytes no arquivo à medida que chegam, sem montar linhas em Python.
+O Parquet é opcional (precisa do pyarrow) e é escrito em lotes lidos de um
+cursor server-side, então a memória também não cresce com o resultado.
+"""
+import os
+import uuid
+from decimal import Decimal
+from typing import Any, Callable
+
+from consultas import Consulta
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+FORMATOS = ("csv", "ndjson", "parquet")
+
+# linhas por row group no Parquet
+LOTE_PARQUET = 50_000
+
+# JSON nunca tem estes dois bytes, então o CSV não cita nem escapa nada e cada linha sai como veio
+COPY_CSV = "COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER)"
+COPY_NDJSON = "COPY (SELECT row_to_json(linha) FROM ({sql}) linha) TO STDOUT WITH (FORMAT csv, QUOTE E'\\x01', DELIMITER E'\\x02')"
+
+
+def formato_do_arquivo(arquivo: str) -> str:
+    extensao = os.path.splitext(arquivo)[1].lower().lstrip(".")
+    if extensao == "jsonl":
+        return "ndjson"
+    if extensao not in FORMATOS:
+        raise ValueError(f"Não sei o formato de {arquivo}; use a extensão .csv, .ndjson/.jsonl ou .parquet")
+    return extensao
+
+
+def sql_com_valores(cursor, consulta: Consulta, valores: dict[str, Any]) -> str:
+    """COPY não aceita parâmetros, então os valores entram no texto já escapados pelo mogrify"""
+    return cursor.mogrify(consulta.sql, valores).decode().strip().rstrip(";")
+
+
+def exportar_copy(conexao, consulta: Consulta, valores: dict[str, Any], arquivo: str, formato: str) -> int:
+    modelo = COPY_CSV if formato == "csv" else COPY_NDJSON
+    with conexao.cursor() as cursor, open(arquivo, "wb") as saida:
+        cursor.copy_expert(modelo.format(sql=sql_com_valores(cursor, consulta, valores)), saida)
+        return cursor.rowcount
+
+
+# OID do tipo no PostgreSQL -> tipo Arrow; o que não estiver aqui vira texto
+def _tipos_arrow() -> dict[int, Any]:
+    return {
+        16: pa.bool_(), 20: pa.int64(), 21: pa.int16(), 23: pa.int32(),
+        700: pa.float32(), 701: pa.float64(),
+        1082: pa.date32(), 1114: pa.timestamp("us"), 1184: pa.timestamp("us", tz="UTC"),
+    }
+
+
+def _coluna_arrow(coluna) -> tuple[Any, Callable[[Any], Any]]:
+    """Tipo Arrow da coluna do cursor e a conversão de cada valor"""
+    if coluna.type_code == 1700:
+        # numeric com precisão declarada mantém o decimal; o de agregações (SUM, AVG) vira float
+        if coluna.precision is not None and coluna.scale is not None:
+            return pa.decimal128(coluna.precision, coluna.scale), lambda v: v
+        return pa.float64(), lambda v: float(v) if isinstance(v, Decimal) else v
+    tipo = _tipos_arrow().get(coluna.type_code)
+    if tipo is not None:
+        return tipo, lambda v: v
+    return pa.string(), lambda v: v if v is None or isinstance(v, str) else str(v)
+
+
+def exportar_parquet(conexao, consulta: Consulta, valores: dict[str, Any], arquivo: str) -> int:
+    if pa is None:
+        raise RuntimeError("Exportar para Parquet precisa do pyarrow (pip install pyarrow)")
+    total = 0
+    autocommit = conexao.autocommit
+    conexao.autocommit = False
+    try:
+        with conexao.cursor(name=f"exportar_{uuid.uuid4().hex}") as cursor:
+            cursor.itersize = LOTE_PARQUET
+            cursor.execute(consulta.sql, valores)
+            lote = cursor.fetchmany(LOTE_PARQUET)
+            colunas = [_coluna_arrow(coluna) for coluna in cursor.description]
+            esquema = pa.schema([(coluna.name, tipo) for coluna, (tipo, _) in zip(cursor.description, colunas)])
+            with pq.ParquetWriter(arquivo, esquema) as escritor:
+                while True:
+                    arrays = [
+                        pa.array([converter(linha[i]) for linha in lote], type=tipo)
+                        for i, (tipo, converter) in enumerate(colunas)
+                    ]
+                    escritor.write_batch(pa.RecordBatch.from_arrays(arrays, schema=esquema))
+                    total += len(lote)
+                    lote = cursor.fetchmany(LOTE_PARQUET)
+                    if not lote:
+                        break
+    finally:
+        conexao.rollback()
+        conexao.autocommit = autocommit
+    return total
+
+
+def exportar(conexao, consulta: Consulta, valores: dict[str, Any], arquivo: str, formato: str) -> int:
+    """Grava o resultado da consulta no arquivo e devolve quantas linhas foram exportadas"""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato {formato} inválido; use {', '.join(FORMATOS)}")
+    if formato == "parquet":
+        return exportar_parquet(conexao, consulta, valores, arquivo)
+    return exportar_copy(conexao, consulta, valores, arquivo, formato)
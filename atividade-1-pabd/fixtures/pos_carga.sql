@@ -0,0 +1,2 @@
+-- os triggers ficam desligados durante o COPY, então os resumos são recalculados de uma vez
+SELECT recalcular_resumos_vendas();
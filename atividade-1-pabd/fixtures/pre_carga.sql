@@ -0,0 +1,2 @@
+-- pedido e itens_pedido são particionados por mês: os meses das fixtures precisam de partição
+SELECT criar_particoes_vendas('2026-09-01', '2026-10-31');
@@ -0,0 +1,215 @@
+"""Gerador de dados sintéticos para o schema de vendas (setup.sql).
+
+Preenche usuario, produto, pedido e itens_pedido com distribuições
+desbalanceadas (poucos clientes e produtos concentram a maior parte das
+vendas, pedidos mais frequentes nos meses recentes) usando COPY FROM STDIN.
+As linhas são geradas sob demanda, então a memória não cresce com a escala.
+
+Uso:
+    python gerador_dados.py --pedidos 100000
+"""
+import argparse
+import bisect
+import itertools
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Iterator
+
+import psycopg2
+
+from config import DB_CONFIG
+
+CATEGORIAS = [
+    "Eletrônicos", "Informática", "Livros", "Calçados", "Casa", "Esporte",
+    "Brinquedos", "Beleza", "Moda", "Games", "Papelaria", "Automotivo",
+]
+STATUS = ["pendente", "confirmado", "processando", "enviado", "entregue", "cancelado"]
+PESOS_STATUS = [5, 5, 5, 10, 68, 7]
+PESOS_ITENS_POR_PEDIDO = [45, 25, 15, 10, 5]  # 1 a 5 itens
+
+# pedidos gerados por bloco; cada bloco tem sua própria semente para poder ser refeito
+TAMANHO_BLOCO = 10_000
+# expoente da distribuição de Zipf usada para clientes, produtos e categorias
+EXPOENTE_ZIPF = 1.1
+
+
+def _pesos_acumulados(n: int) -> list[float]:
+    return list(itertools.accumulate(1 / (i + 1) ** EXPOENTE_ZIPF for i in range(n)))
+
+
+def _sortear(rng: random.Random, acumulados: list[float]) -> int:
+    """Índice (a partir de 0) sorteado segundo os pesos acumulados"""
+    return bisect.bisect_left(acumulados, rng.random() * acumulados[-1])
+
+
+class FonteCopy:
+    """Objeto tipo arquivo que o copy_expert lê; as linhas são geradas só quando pedidas"""
+    def __init__(self, linhas: Iterator[str]):
+        self._linhas = linhas
+        self._sobra = ""
+
+    def read(self, tamanho: int = -1) -> str:
+        partes = [self._sobra]
+        total = len(self._sobra)
+        while tamanho < 0 or total < tamanho:
+            linha = next(self._linhas, None)
+            if linha is None:
+                break
+            partes.append(linha)
+            total += len(linha)
+        texto = "".join(partes)
+        if tamanho < 0:
+            self._sobra = ""
+            return texto
+        self._sobra = texto[tamanho:]
+        return texto[:tamanho]
+
+
+class GeradorVendas:
+    def __init__(self, pedidos: int, semente: int = 42, meses: int = 24):
+        self.pedidos = pedidos
+        self.semente = semente
+        self.meses = meses
+        self.usuarios = max(100, pedidos // 5)
+        self.produtos = max(50, min(pedidos // 20, 50_000))
+        self.fim = datetime.now().replace(microsecond=0)
+        self.inicio = self.fim - timedelta(days=30 * meses)
+        self._acum_usuarios = _pesos_acumulados(self.usuarios)
+        self._acum_produtos = _pesos_acumulados(self.produtos)
+        self._acum_categorias = _pesos_acumulados(len(CATEGORIAS))
+        self._acum_itens = list(itertools.accumulate(PESOS_ITENS_POR_PEDIDO))
+        self._acum_status = list(itertools.accumulate(PESOS_STATUS))
+        self._precos = self._gerar_precos()
+
+    def _gerar_precos(self) -> list[float]:
+        rng = random.Random(f"{self.semente}-precos")
+        return [round(min(rng.lognormvariate(4.5, 1.0), 20_000), 2) for _ in range(self.produtos)]
+
+    def linhas_usuario(self) -> Iterator[str]:
+        rng = random.Random(f"{self.semente}-usuarios")
+        for id_usuario in range(1, self.usuarios + 1):
+            telefone = r"\N" if rng.random() < 0.15 else f"(11) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}"
+            ativo = "f" if rng.random() < 0.1 else "t"
+            nascimento = datetime(1950, 1, 1) + timedelta(days=rng.randint(0, 365 * 55))
+            yield (f"{id_usuario}\tUsuário {id_usuario}\tusuario{id_usuario}@email.com\t{telefone}\t"
+                   f"Rua {id_usuario}, São Paulo - SP\t{nascimento:%Y-%m-%d}\t{ativo}\n")
+
+    def linhas_produto(self) -> Iterator[str]:
+        rng = random.Random(f"{self.semente}-produtos")
+        for id_produto in range(1, self.produtos + 1):
+            categoria = CATEGORIAS[_sortear(rng, self._acum_categorias)]
+            estoque = rng.randint(0, 40) if rng.random() < 0.2 else rng.randint(40, 1000)
+            ativo = "f" if rng.random() < 0.05 else "t"
+            yield (f"{id_produto}\tProduto {id_produto}\tDescrição do produto {id_produto}\t{categoria}\t"
+                   f"{self._precos[id_produto - 1]:.2f}\t{estoque}\t{rng.uniform(0.05, 30):.3f}\t{ativo}\n")
+
+    def _bloco(self, numero: int) -> Iterator[tuple[tuple, list[tuple]]]:
+        """Pedidos do bloco com seus itens; a mesma semente gera sempre o mesmo bloco"""
+        rng = random.Random(f"{self.semente}-pedidos-{numero}")
+        primeiro = numero * TAMANHO_BLOCO + 1
+        ultimo = min(primeiro + TAMANHO_BLOCO - 1, self.pedidos)
+        segundos = int((self.fim - self.inicio).total_seconds())
+        for id_pedido in range(primeiro, ultimo + 1):
+            id_usuario = _sortear(rng, self._acum_usuarios) + 1
+            # triangular com moda no fim: mais pedidos nos meses recentes
+            data = self.inicio + timedelta(seconds=int(rng.triangular(0, segundos, segundos)))
+            status = STATUS[_sortear(rng, self._acum_status)]
+            quantidade_itens = _sortear(rng, self._acum_itens) + 1
+            produtos = set()
+            while len(produtos) < quantidade_itens:
+                produtos.add(_sortear(rng, self._acum_produtos) + 1)
+            itens = [(id_produto, rng.randint(1, 5), self._precos[id_produto - 1]) for id_produto in produtos]
+            valor_total = sum(quantidade * preco for _, quantidade, preco in itens)
+            yield (id_pedido, id_usuario, data, status, valor_total), itens
+
+    def _blocos(self) -> Iterator[tuple[tuple, list[tuple]]]:
+        for numero in range((self.pedidos + TAMANHO_BLOCO - 1) // TAMANHO_BLOCO):
+            yield from self._bloco(numero)
+
+    def linhas_pedido(self) -> Iterator[str]:
+        for (id_pedido, id_usuario, data, status, valor_total), _ in self._blocos():
+            yield (f"{id_pedido}\t{id_usuario}\t{data:%Y-%m-%d %H:%M:%S}\t{status}\t{valor_total:.2f}\t"
+                   f"Rua {id_usuario}, São Paulo - SP\n")
+
+    def linhas_itens(self) -> Iterator[str]:
+        for (id_pedido, _, data, *_), itens in self._blocos():
+            for id_produto, quantidade, preco in itens:
+                yield f"{id_pedido}\t{data:%Y-%m-%d %H:%M:%S}\t{id_produto}\t{quantidade}\t{preco:.2f}\n"
+
+
+COPIAS = [
+    ("usuario", "id_usuario, nome, email, telefone, endereco, data_nascimento, ativo", "linhas_usuario"),
+    ("produto", "id_produto, nome, descricao, categoria, preco, quantidade_estoque, peso, ativo", "linhas_produto"),
+    ("pedido", "id_pedido, id_usuario, data_pedido, status_pedido, valor_total, endereco_entrega", "linhas_pedido"),
+    ("itens_pedido", "id_pedido, data_pedido, id_produto, quantidade, preco_unitario", "linhas_itens"),
+]
+SEQUENCIAS = [("usuario", "id_usuario"), ("produto", "id_produto"), ("pedido", "id_pedido"), ("itens_pedido", "id_item")]
+
+
+def popular(conexao, pedidos: int, semente: int = 42, meses: int = 24) -> dict:
+    """Apaga os dados atuais e carrega a escala pedida numa única transação.
+    Os triggers de resumo ficam desligados durante o COPY e os resumos são
+    recalculados de uma vez no final; o VACUUM ANALYZE roda depois do commit"""
+    gerador = GeradorVendas(pedidos, semente, meses)
+    tempos = {}
+    autocommit = conexao.autocommit
+    conexao.autocommit = False
+    try:
+        with conexao.cursor() as cursor:
+            cursor.execute("TRUNCATE itens_pedido, pedido, produto, usuario RESTART IDENTITY CASCADE;")
+            # pedido e itens_pedido são particionados por mês: todo o período gerado precisa de partição
+            cursor.execute("SELECT criar_particoes_vendas(%s, %s);", (gerador.inicio.date(), gerador.fim.date()))
+            cursor.execute("ALTER TABLE pedido DISABLE TRIGGER USER;")
+            cursor.execute("ALTER TABLE itens_pedido DISABLE TRIGGER USER;")
+            for tabela, colunas, metodo in COPIAS:
+                inicio = time.perf_counter()
+                cursor.copy_expert(f"COPY {tabela} ({colunas}) FROM STDIN", FonteCopy(getattr(gerador, metodo)()))
+                tempos[tabela] = time.perf_counter() - inicio
+                print(f"{tabela:<15} {cursor.rowcount:>12} linha(s) em {tempos[tabela]:.1f} s")
+            cursor.execute("ALTER TABLE pedido ENABLE TRIGGER USER;")
+            cursor.execute("ALTER TABLE itens_pedido ENABLE TRIGGER USER;")
+            cursor.execute("SELECT recalcular_resumos_vendas();")
+            for tabela, coluna in SEQUENCIAS:
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence('{tabela}', '{coluna}'), "
+                    f"COALESCE((SELECT MAX({coluna}) FROM {tabela}), 0) + 1, false);"
+                )
+        conexao.commit()
+        # VACUUM não roda dentro de transação; além das estatísticas, marca as páginas
+        # no visibility map para o planejador poder usar index-only scans
+        conexao.autocommit = True
+        inicio = time.perf_counter()
+        with conexao.cursor() as cursor:
+            cursor.execute("VACUUM ANALYZE usuario, produto, pedido, itens_pedido;")
+        tempos["vacuum_analyze"] = time.perf_counter() - inicio
+    except BaseException:
+        if not conexao.autocommit:
+            conexao.rollback()
+        raise
+    finally:
+        conexao.autocommit = autocommit
+    return {"pedidos": pedidos, "usuarios": gerador.usuarios, "produtos": gerador.produtos, "tempos_s": tempos}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos para o schema de vendas")
+    parser.add_argument("--pedidos", type=int, default=10_000, help="quantidade de pedidos (10k a 10M)")
+    parser.add_argument("--semente", type=int, default=42, help="semente para gerar sempre os mesmos dados")
+    parser.add_argument("--meses", type=int, default=24, help="quantos meses de histórico gerar")
+    args = parser.parse_args()
+
+    try:
+        conexao = psycopg2.connect(**DB_CONFIG)
+    except psycopg2.Error as e:
+        print(f"Erro ao conectar ao PostgreSQL: {e}")
+        sys.exit(1)
+    try:
+        popular(conexao, args.pedidos, args.semente, args.meses)
+    finally:
+        conexao.close()
+
+
+if __name__ == "__main__":
+    main()
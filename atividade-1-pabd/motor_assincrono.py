@@ -0,0 +1,79 @@
+"""Execução assíncrona das consultas do catálogo com psycopg 3.
+
+Cada consulta roda numa conexão de um AsyncConnectionPool e todas são
+disparadas juntas com asyncio.gather. O statement_timeout é definido por
+consulta (SET LOCAL dentro da transação), e se a tarefa for cancelada (Ctrl-C
+ou tempo esgotado no cliente) o servidor recebe um cancel em vez de continuar
+executando a query sozinho.
+
+Precisa de psycopg >= 3.2 e psycopg_pool (pip install "psycopg[binary]" psycopg_pool).
+"""
+import asyncio
+import time
+from typing import Any, Optional
+
+import psycopg
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import AsyncConnectionPool
+
+from config import DB_CONFIG
+from consultas import Consulta
+
+# tempo máximo de cada consulta no servidor, em segundos (None = sem limite)
+TIMEOUT_PADRAO = 30.0
+
+
+def conninfo(config: dict[str, Any] = DB_CONFIG) -> str:
+    """O DB_CONFIG usa as chaves do psycopg2; o libpq chama o banco de dbname"""
+    parametros = dict(config)
+    parametros["dbname"] = parametros.pop("database")
+    return make_conninfo(**parametros)
+
+
+async def executar_consulta(pool: AsyncConnectionPool, consulta: Consulta, valores: dict[str, Any],
+                            timeout: Optional[float] = TIMEOUT_PADRAO) -> dict:
+    inicio = time.perf_counter()
+    async with pool.connection() as conexao:
+        try:
+            async with conexao.transaction(), conexao.cursor() as cursor:
+                if timeout:
+                    await cursor.execute("SELECT set_config('statement_timeout', %s, true);",
+                                         (f"{int(timeout * 1000)}ms",))
+                try:
+                    await cursor.execute(consulta.sql, valores)
+                except asyncio.CancelledError:
+                    # a tarefa morreu, mas sem o cancel a query continuaria rodando no servidor
+                    await conexao.cancel_safe()
+                    raise
+                colunas = [desc.name for desc in cursor.description] if cursor.description else []
+                linhas = await cursor.fetchall() if cursor.description else []
+        except psycopg.errors.QueryCanceled:
+            return {"consulta": consulta.nome, "tempo_s": time.perf_counter() - inicio,
+                    "erro": f"cancelada pelo statement_timeout de {timeout} s"}
+        except psycopg.Error as e:
+            return {"consulta": consulta.nome, "tempo_s": time.perf_counter() - inicio, "erro": str(e).strip()}
+    return {
+        "consulta": consulta.nome,
+        "descricao": consulta.cabecalho(valores),
+        "parametros": valores,
+        "tempo_s": time.perf_counter() - inicio,
+        "quantidade_linhas": len(linhas),
+        "colunas": colunas,
+        "linhas": linhas,
+    }
+
+
+async def executar_todas(consultas: list[Consulta], conexoes: int,
+                         timeout: Optional[float] = TIMEOUT_PADRAO) -> list[dict]:
+    """Dispara todas as consultas ao mesmo tempo; o pool limita quantas rodam em paralelo"""
+    async with AsyncConnectionPool(conninfo(), min_size=1, max_size=conexoes, open=False) as pool:
+        return await asyncio.gather(
+            *(executar_consulta(pool, consulta, consulta.valores(), timeout) for consulta in consultas)
+        )
+
+
+def executar_lote_assincrono(consultas: list[Consulta], conexoes: int,
+                             timeout: Optional[float] = TIMEOUT_PADRAO) -> list[dict]:
+    """Ponto de entrada síncrono. No Ctrl-C o asyncio.run cancela as tarefas, cada
+    uma cancela a sua query no servidor, e o KeyboardInterrupt segue para quem chamou"""
+    return asyncio.run(executar_todas(consultas, conexoes, timeout))
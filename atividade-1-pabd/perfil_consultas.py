@@ -0,0 +1,109 @@
+"""Leitura dos planos do EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON).
+
+Resume cada plano em tempos, buffers, nós mais caros e tipos de varredura, e
+compara um conjunto de perfis com uma baseline salva para apontar regressões
+(por exemplo um Seq Scan aparecendo onde antes havia um Index Scan).
+"""
+import json
+import os
+from typing import Iterator
+
+EXPLAIN_PREFIXO = "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) "
+ARQUIVO_BASELINE_PADRAO = os.path.join("perfis", "baseline.json")
+ARQUIVO_ULTIMO_PADRAO = os.path.join("perfis", "ultimo.json")
+
+# quantos nós aparecem no resumo
+TOP_NOS = 5
+# execução quantas vezes mais lenta que a baseline para virar alerta
+LIMITE_REGRESSAO = 1.5
+# e pelo menos quantos ms a mais (abaixo disso é ruído de medição)
+DIFERENCA_MINIMA_MS = 1.0
+
+
+def _nos(plano: dict) -> Iterator[dict]:
+    yield plano
+    for filho in plano.get("Plans", []):
+        yield from _nos(filho)
+
+
+def descrever_no(no: dict) -> str:
+    texto = no["Node Type"]
+    if "Index Name" in no:
+        texto += f" using {no['Index Name']}"
+    if "Relation Name" in no:
+        texto += f" on {no['Relation Name']}"
+    return texto
+
+
+def indices_usados(plano: dict) -> set[str]:
+    return {no["Index Name"] for no in _nos(plano) if "Index Name" in no}
+
+
+def resumir_plano(explain: list) -> dict:
+    """Recebe o JSON devolvido pelo EXPLAIN e monta o resumo que é exibido e salvo"""
+    raiz = explain[0]
+    plano = raiz["Plan"]
+    nos = list(_nos(plano))
+    mais_caros = sorted(nos, key=lambda no: no["Total Cost"], reverse=True)[:TOP_NOS]
+    varreduras: dict[str, list[str]] = {}
+    for no in nos:
+        if "Relation Name" in no:
+            varreduras.setdefault(no["Relation Name"], []).append(descrever_no(no))
+    return {
+        "planejamento_ms": raiz["Planning Time"],
+        "execucao_ms": raiz["Execution Time"],
+        # os buffers do nó raiz já somam os de todos os filhos
+        "buffers_hit": plano.get("Shared Hit Blocks", 0),
+        "buffers_read": plano.get("Shared Read Blocks", 0),
+        "nos_mais_caros": [
+            {
+                "no": descrever_no(no),
+                "custo": no["Total Cost"],
+                "tempo_ms": no.get("Actual Total Time", 0) * no.get("Actual Loops", 1),
+                "linhas": no.get("Actual Rows", 0),
+            }
+            for no in mais_caros
+        ],
+        "varreduras": {relacao: sorted(set(lista)) for relacao, lista in varreduras.items()},
+        "plano": plano,
+    }
+
+
+def comparar(atuais: dict[str, dict], baseline: dict[str, dict]) -> list[str]:
+    """Lista as mudanças de plano e de tempo entre os perfis atuais e a baseline"""
+    alertas = []
+    for nome, atual in atuais.items():
+        base = baseline.get(nome)
+        if base is None:
+            continue
+        for relacao, varreduras in atual["varreduras"].items():
+            antes = base["varreduras"].get(relacao, [])
+            seq_agora = any(v.startswith("Seq Scan") for v in varreduras)
+            seq_antes = any(v.startswith("Seq Scan") for v in antes)
+            if seq_agora and antes and not seq_antes:
+                alertas.append(f"{nome}: Seq Scan em {relacao} (antes: {', '.join(antes)})")
+            elif antes and set(varreduras) != set(antes):
+                alertas.append(f"{nome}: plano mudou em {relacao}: {', '.join(antes)} -> {', '.join(varreduras)}")
+        if (atual["execucao_ms"] > base["execucao_ms"] * LIMITE_REGRESSAO
+                and atual["execucao_ms"] - base["execucao_ms"] >= DIFERENCA_MINIMA_MS):
+            fator = atual["execucao_ms"] / max(base["execucao_ms"], 0.001)
+            alertas.append(
+                f"{nome}: execução {fator:.1f}x mais lenta "
+                f"({base['execucao_ms']:.2f} ms -> {atual['execucao_ms']:.2f} ms)"
+            )
+    return alertas
+
+
+def salvar_perfis(perfis: dict[str, dict], arquivo: str) -> None:
+    pasta = os.path.dirname(arquivo)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    with open(arquivo, "w", encoding="utf-8") as f:
+        json.dump(perfis, f, ensure_ascii=False, indent=2)
+
+
+def carregar_perfis(arquivo: str) -> dict[str, dict]:
+    if not os.path.exists(arquivo):
+        return {}
+    with open(arquivo, encoding="utf-8") as f:
+        return json.load(f)
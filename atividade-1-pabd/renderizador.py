@@ -0,0 +1,102 @@
+"""Renderização de tabelas linha por linha, no mesmo desenho do fancy_grid do tabulate.
+
+O tabulate monta a tabela inteira numa string antes de imprimir, e para isso
+precisa de todas as linhas. Aqui as larguras das colunas saem de uma amostra
+das primeiras linhas e cada linha é escrita assim que chega; valores maiores
+que a largura calculada são cortados com "…".
+"""
+import itertools
+import sys
+from decimal import Decimal
+from typing import Any, Iterable, Iterator, Optional, TextIO
+
+# linhas usadas para calcular a largura das colunas
+AMOSTRA_PADRAO = 200
+# nenhuma coluna passa disso, por mais largo que seja o valor
+LARGURA_MAXIMA_COLUNA = 40
+
+
+def formatar_valor(valor: Any) -> str:
+    if valor is None:
+        return ""
+    if isinstance(valor, float):
+        return format(valor, "g")
+    return str(valor)
+
+
+def _numerico(valor: Any) -> bool:
+    return isinstance(valor, (int, float, Decimal)) and not isinstance(valor, bool)
+
+
+class RenderizadorTabela:
+    def __init__(self, colunas: list[str], amostra: list[tuple], largura_maxima: int = LARGURA_MAXIMA_COLUNA):
+        self.colunas = colunas
+        self.larguras = [
+            min(max([len(nome)] + [len(formatar_valor(linha[i])) for linha in amostra]), largura_maxima)
+            for i, nome in enumerate(colunas)
+        ]
+        # coluna numérica (pela amostra) fica alinhada à direita, como no tabulate
+        self.numericas = [
+            bool(amostra) and all(_numerico(linha[i]) or linha[i] is None for linha in amostra)
+            for i in range(len(colunas))
+        ]
+
+    @property
+    def largura(self) -> int:
+        return sum(self.larguras) + 3 * len(self.larguras) + 1
+
+    def _borda(self, esquerda: str, meio: str, direita: str, traco: str) -> str:
+        return esquerda + meio.join(traco * (largura + 2) for largura in self.larguras) + direita
+
+    def _celulas(self, valores: Iterable[str], numericas: Iterable[bool]) -> str:
+        celulas = []
+        for texto, largura, numerica in zip(valores, self.larguras, numericas):
+            if len(texto) > largura:
+                texto = texto[:largura - 1] + "…"
+            celulas.append(texto.rjust(largura) if numerica else texto.ljust(largura))
+        return "│ " + " │ ".join(celulas) + " │"
+
+    def topo(self) -> str:
+        return self._borda("╒", "╤", "╕", "═")
+
+    def cabecalho(self) -> str:
+        return self._celulas(self.colunas, self.numericas)
+
+    def separador(self) -> str:
+        return self._borda("╞", "╪", "╡", "═")
+
+    def linha(self, valores: tuple) -> str:
+        return self._celulas((formatar_valor(v) for v in valores), self.numericas)
+
+    def base(self) -> str:
+        return self._borda("╘", "╧", "╛", "═")
+
+
+def renderizar(colunas: list[str], linhas: Iterable[tuple], descricao: str = "",
+               saida: Optional[TextIO] = None, amostra: int = AMOSTRA_PADRAO) -> int:
+    """Escreve a tabela em saida (padrão: stdout) à medida que as linhas são consumidas
+    e devolve quantas foram"""
+    saida = saida or sys.stdout
+    linhas = iter(linhas)
+    primeiras = list(itertools.islice(linhas, amostra))
+    tabela = RenderizadorTabela(colunas, primeiras)
+    if descricao:
+        saida.write(descricao.center(tabela.largura) + "\n")
+    saida.write(tabela.topo() + "\n")
+    saida.write(tabela.cabecalho() + "\n")
+    saida.write(tabela.separador() + "\n")
+    total = 0
+    for valores in itertools.chain(primeiras, linhas):
+        saida.write(tabela.linha(valores) + "\n")
+        total += 1
+    saida.write(tabela.base() + "\n")
+    return total
+
+
+def linhas_das_paginas(paginas: Iterator[tuple[list[str], list[tuple]]]) -> tuple[list[str], Iterator[tuple]]:
+    """Transforma as páginas do executar_query_stream em (colunas, linhas) para o renderizar"""
+    primeira = next(paginas, None)
+    if primeira is None:
+        return [], iter(())
+    colunas, pagina = primeira
+    return colunas, itertools.chain(pagina, itertools.chain.from_iterable(linhas for _, linhas in paginas))
@@ -1,4 +1,8 @@
 -- Remover tabelas se já existirem (ordem inversa das dependências)
+DROP TABLE IF EXISTS usuario_estatisticas CASCADE;
+DROP TABLE IF EXISTS vendas_mensais CASCADE;
+DROP TABLE IF EXISTS vendas_mensais_produto CASCADE;
+DROP TABLE IF EXISTS vendas_produto CASCADE;
 DROP TABLE IF EXISTS itens_pedido CASCADE;
 DROP TABLE IF EXISTS pedido CASCADE;
 DROP TABLE IF EXISTS produto CASCADE;
@@ -6,6 +10,8 @@ DROP TABLE IF EXISTS usuario CASCADE;
 
 -- Remover tipos personalizados se existirem
 DROP TYPE IF EXISTS status_pedido_enum CASCADE;
+DROP TYPE IF EXISTS delta_item_venda CASCADE;
+DROP TYPE IF EXISTS delta_usuario_estatisticas CASCADE;
 
 -- ==========================================
 -- TIPOS PERSONALIZADOS
@@ -54,10 +60,13 @@ CREATE TABLE produto (
 -- ==========================================
 -- TABELA: PEDIDO
 -- ==========================================
+-- Particionada por mês de data_pedido (ver PARTIÇÕES abaixo). Chaves primárias e
+-- únicas de tabela particionada precisam conter a coluna de partição, por isso
+-- data_pedido faz parte da chave.
 CREATE TABLE pedido (
-    id_pedido SERIAL PRIMARY KEY,
+    id_pedido SERIAL,
     id_usuario INTEGER NOT NULL,
-    data_pedido TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    data_pedido TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     status_pedido status_pedido_enum DEFAULT 'pendente',
     valor_total DECIMAL(12,2) DEFAULT 0.00 CHECK (valor_total >= 0),
     endereco_entrega TEXT NOT NULL,
@@ -65,32 +74,512 @@ CREATE TABLE pedido (
     data_entrega_prevista DATE,
     data_entrega_real DATE,
     
+    PRIMARY KEY (id_pedido, data_pedido),
+
     -- Chave estrangeira
     CONSTRAINT fk_pedido_usuario FOREIGN KEY (id_usuario) 
         REFERENCES usuario(id_usuario) ON DELETE RESTRICT
-);
+) PARTITION BY RANGE (data_pedido);
 
 -- ==========================================
 -- TABELA: ITENS_PEDIDO
 -- ==========================================
+-- Leva a data do pedido para cair na partição do mesmo mês que ele.
+-- O ON UPDATE CASCADE acompanha o pedido quando a data dele muda.
 CREATE TABLE itens_pedido (
-    id_item SERIAL PRIMARY KEY,
+    id_item SERIAL,
     id_pedido INTEGER NOT NULL,
+    data_pedido TIMESTAMP NOT NULL,
     id_produto INTEGER NOT NULL,
     quantidade INTEGER NOT NULL CHECK (quantidade > 0),
     preco_unitario DECIMAL(10,2) NOT NULL CHECK (preco_unitario >= 0),
     subtotal DECIMAL(12,2) GENERATED ALWAYS AS (quantidade * preco_unitario) STORED,
     
+    PRIMARY KEY (id_item, data_pedido),
+
     -- Chaves estrangeiras
-    CONSTRAINT fk_itens_pedido FOREIGN KEY (id_pedido) 
-        REFERENCES pedido(id_pedido) ON DELETE CASCADE,
+    CONSTRAINT fk_itens_pedido FOREIGN KEY (id_pedido, data_pedido) 
+        REFERENCES pedido(id_pedido, data_pedido) ON DELETE CASCADE ON UPDATE CASCADE,
     CONSTRAINT fk_itens_produto FOREIGN KEY (id_produto) 
         REFERENCES produto(id_produto) ON DELETE RESTRICT,
     
     -- Índice único para evitar duplicação de produto no mesmo pedido
-    CONSTRAINT unique_pedido_produto UNIQUE (id_pedido, id_produto)
+    CONSTRAINT unique_pedido_produto UNIQUE (id_pedido, id_produto, data_pedido)
+) PARTITION BY RANGE (data_pedido);
+
+-- ==========================================
+-- PARTIÇÕES
+-- ==========================================
+
+-- Uma partição por mês em cada tabela, com o mesmo sufixo (pedido_p2024_01 e
+-- itens_pedido_p2024_01). Consultas com filtro em data_pedido (a 5, os
+-- anti-joins com janela) só leem as partições dos meses pedidos, e arquivar
+-- histórico é um DETACH em vez de DELETE.
+
+-- Cria as partições de todos os meses entre p_inicio e p_fim que ainda não existem
+CREATE OR REPLACE FUNCTION criar_particoes_vendas(p_inicio DATE, p_fim DATE) RETURNS INTEGER AS $$
+DECLARE
+    mes DATE := date_trunc('month', p_inicio)::DATE;
+    tabela TEXT;
+    particao TEXT;
+    criadas INTEGER := 0;
+BEGIN
+    WHILE mes <= p_fim LOOP
+        FOREACH tabela IN ARRAY ARRAY['pedido', 'itens_pedido'] LOOP
+            particao := tabela || to_char(mes, '"_p"YYYY_MM');
+            IF to_regclass(particao) IS NULL THEN
+                EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                               particao, tabela, mes, (mes + INTERVAL '1 month')::DATE);
+                criadas := criadas + 1;
+            END IF;
+        END LOOP;
+        mes := (mes + INTERVAL '1 month')::DATE;
+    END LOOP;
+    RETURN criadas;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Desanexa as partições dos meses anteriores a p_antes; os dados continuam em
+-- tabelas avulsas renomeadas para arquivo_<partição>. A de itens sai primeiro e
+-- perde a FK para pedido, senão o DETACH do pedido seria barrado.
+-- Os resumos de vendas não mudam: arquivar não é apagar.
+CREATE OR REPLACE FUNCTION arquivar_particoes_vendas(p_antes DATE) RETURNS SETOF TEXT AS $$
+DECLARE
+    particao TEXT;
+    particao_itens TEXT;
+BEGIN
+    FOR particao IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'pedido'::regclass
+          AND c.relname ~ '^pedido_p\d{4}_\d{2}$'
+          AND to_date(right(c.relname, 7), 'YYYY_MM') < date_trunc('month', p_antes)
+        ORDER BY c.relname
+    LOOP
+        particao_itens := 'itens_' || particao;
+        IF EXISTS (SELECT 1 FROM pg_inherits
+                   WHERE inhparent = 'itens_pedido'::regclass AND inhrelid = to_regclass(particao_itens)) THEN
+            EXECUTE format('ALTER TABLE itens_pedido DETACH PARTITION %I', particao_itens);
+            EXECUTE format('ALTER TABLE %I DROP CONSTRAINT fk_itens_pedido', particao_itens);
+            EXECUTE format('ALTER TABLE %I RENAME TO %I', particao_itens, 'arquivo_' || particao_itens);
+            RETURN NEXT 'arquivo_' || particao_itens;
+        END IF;
+        EXECUTE format('ALTER TABLE pedido DETACH PARTITION %I', particao);
+        EXECUTE format('ALTER TABLE %I RENAME TO %I', particao, 'arquivo_' || particao);
+        RETURN NEXT 'arquivo_' || particao;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Rotina periódica (cron, pg_cron): garante o mês atual e os próximos
+-- p_meses_futuros e, se p_meses_retidos for informado, arquiva o que for mais antigo.
+--   SELECT * FROM manter_particoes_vendas(3, 24);
+CREATE OR REPLACE FUNCTION manter_particoes_vendas(p_meses_futuros INTEGER DEFAULT 3, p_meses_retidos INTEGER DEFAULT NULL)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    mes_atual DATE := date_trunc('month', CURRENT_DATE)::DATE;
+BEGIN
+    PERFORM criar_particoes_vendas(mes_atual, (mes_atual + make_interval(months => p_meses_futuros))::DATE);
+    IF p_meses_retidos IS NOT NULL THEN
+        RETURN QUERY SELECT arquivar_particoes_vendas((mes_atual - make_interval(months => p_meses_retidos))::DATE);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Último ano e os próximos meses; o gerador_dados.py cria as que faltarem para o histórico dele
+DO $$
+BEGIN
+    PERFORM criar_particoes_vendas((CURRENT_DATE - INTERVAL '12 months')::DATE, (CURRENT_DATE + INTERVAL '3 months')::DATE);
+END;
+$$;
+
+-- ==========================================
+-- ÍNDICES
+-- ==========================================
+
+-- Cada índice atende o predicado de uma ou mais consultas da CLI (consultas.py).
+-- O verificar_indices.py confere pelo EXPLAIN que cada relatório usa o seu.
+
+-- Chaves estrangeiras (o PostgreSQL não cria índice para elas sozinho)
+-- 11. clientes sem compras: o NOT EXISTS vira uma sondagem (id_usuario, data_pedido >= corte) por cliente
+CREATE INDEX idx_pedido_usuario_data ON pedido (id_usuario, data_pedido);
+-- 14. produtos não vendidos: mesma ideia, (id_produto, data_pedido >= corte) por produto
+CREATE INDEX idx_itens_pedido_produto ON itens_pedido (id_produto, data_pedido);
+-- itens_pedido(id_pedido) já é coberto por unique_pedido_produto (id_pedido, id_produto, data_pedido)
+
+-- 1. usuários ativos fica sem índice: quase todos são ativos e o Seq Scan é o plano certo
+
+-- 7. usuários ativos sem telefone: parcial, só as linhas que a consulta devolve
+CREATE INDEX idx_usuario_ativos_sem_telefone ON usuario (id_usuario)
+    WHERE ativo AND telefone IS NULL;
+
+-- 2. produtos de uma categoria por preço e 6. mais caro de cada categoria
+-- (preco DESC deixa a janela PARTITION BY categoria ORDER BY preco DESC sem sort;
+-- o ORDER BY preco ASC da consulta 2 lê o mesmo índice de trás para frente)
+CREATE INDEX idx_produto_categoria_preco ON produto (categoria, preco DESC)
+    INCLUDE (nome, quantidade_estoque);
+
+-- 4. estoque baixo
+CREATE INDEX idx_produto_estoque ON produto (quantidade_estoque)
+    INCLUDE (nome, categoria);
+
+-- 3. contagem por status e 8. pedidos de um status
+CREATE INDEX idx_pedido_status ON pedido (status_pedido);
+
+-- 5. pedidos recentes fica sem índice: a poda de partições já limita a leitura
+-- aos dois ou três últimos meses, que são lidos quase inteiros
+
+-- ==========================================
+-- NOTIFICAÇÃO DE ALTERAÇÕES
+-- ==========================================
+
+-- Avisa no canal vendas_alteracoes qual tabela mudou, uma vez por comando.
+-- A CLI faz LISTEN nesse canal e tira do cache só as consultas que leem a tabela.
+CREATE OR REPLACE FUNCTION notificar_alteracao_vendas() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('vendas_alteracoes', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_notificar_usuario
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON usuario
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_alteracao_vendas();
+
+CREATE TRIGGER trg_notificar_produto
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON produto
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_alteracao_vendas();
+
+CREATE TRIGGER trg_notificar_pedido
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON pedido
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_alteracao_vendas();
+
+CREATE TRIGGER trg_notificar_itens_pedido
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON itens_pedido
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_alteracao_vendas();
+
+-- ==========================================
+-- ALERTAS DE ESTOQUE
+-- ==========================================
+
+-- Avisa no canal estoque_baixo quando um produto cruza o limite de estoque, para
+-- baixo ('baixo') ou de volta para cima ('normalizado'). O payload é um JSON com
+-- o produto, o estoque atual e o limite. Só dispara na travessia, então um
+-- produto que já está baixo e continua baixo não gera alerta repetido.
+-- O limite vem da configuração vendas.limite_estoque_baixo (padrão 30), que vale
+-- para a sessão que altera o estoque; para o banco inteiro:
+--   ALTER DATABASE postgres SET vendas.limite_estoque_baixo = '20';
+CREATE OR REPLACE FUNCTION notificar_estoque_baixo() RETURNS TRIGGER AS $$
+DECLARE
+    limite INTEGER := COALESCE(NULLIF(current_setting('vendas.limite_estoque_baixo', true), '')::INTEGER, 30);
+    estava_baixo BOOLEAN := TG_OP = 'UPDATE' AND OLD.quantidade_estoque < limite;
+    esta_baixo BOOLEAN := NEW.quantidade_estoque < limite;
+BEGIN
+    IF esta_baixo <> estava_baixo THEN
+        PERFORM pg_notify('estoque_baixo', json_build_object(
+            'evento', CASE WHEN esta_baixo THEN 'baixo' ELSE 'normalizado' END,
+            'id_produto', NEW.id_produto,
+            'nome', NEW.nome,
+            'quantidade_estoque', NEW.quantidade_estoque,
+            'limite', limite
+        )::TEXT);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_estoque_baixo_insert
+    AFTER INSERT ON produto
+    FOR EACH ROW EXECUTE FUNCTION notificar_estoque_baixo();
+
+CREATE TRIGGER trg_estoque_baixo_update
+    AFTER UPDATE OF quantidade_estoque ON produto
+    FOR EACH ROW
+    WHEN (OLD.quantidade_estoque IS DISTINCT FROM NEW.quantidade_estoque)
+    EXECUTE FUNCTION notificar_estoque_baixo();
+
+-- ==========================================
+-- RESUMOS DE VENDAS
+-- ==========================================
+
+-- Os relatórios 10 (ranking de produtos) e 13 (relatório mensal) leem estas
+-- tabelas em vez de agregar itens_pedido inteiro. Elas são mantidas pelos
+-- triggers abaixo, então o custo do relatório depende só da quantidade de
+-- meses e de produtos, não do histórico de pedidos.
+
+-- Total vendido por produto
+CREATE TABLE vendas_produto (
+    id_produto INTEGER PRIMARY KEY,
+    total_vendido BIGINT NOT NULL DEFAULT 0,
+    faturamento DECIMAL(14,2) NOT NULL DEFAULT 0,
+
+    CONSTRAINT fk_vendas_produto FOREIGN KEY (id_produto)
+        REFERENCES produto(id_produto) ON DELETE CASCADE
+);
+
+-- Quantidade de itens vendidos de cada produto em cada mês
+-- (serve para saber quando um produto entra ou sai da contagem de produtos diferentes do mês)
+CREATE TABLE vendas_mensais_produto (
+    periodo DATE NOT NULL,
+    id_produto INTEGER NOT NULL,
+    itens INTEGER NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (periodo, id_produto),
+    CONSTRAINT fk_vendas_mensais_produto FOREIGN KEY (id_produto)
+        REFERENCES produto(id_produto) ON DELETE CASCADE
+);
+
+-- Totais do mês (periodo = primeiro dia do mês)
+CREATE TABLE vendas_mensais (
+    periodo DATE PRIMARY KEY,
+    total_pedidos INTEGER NOT NULL DEFAULT 0,
+    produtos_diferentes INTEGER NOT NULL DEFAULT 0,
+    faturamento_total DECIMAL(14,2) NOT NULL DEFAULT 0
+);
+
+-- Variação de um item de pedido: sinal = 1 quando o item entra, -1 quando sai
+CREATE TYPE delta_item_venda AS (
+    periodo DATE,
+    id_pedido INTEGER,
+    id_produto INTEGER,
+    quantidade INTEGER,
+    subtotal DECIMAL(12,2),
+    sinal INTEGER
+);
+
+-- Aplica um lote de variações nas três tabelas de resumo.
+-- Um pedido (ou produto) só entra na contagem do mês quando passa de 0 para
+-- algum item naquele mês, e só sai quando volta a 0.
+CREATE OR REPLACE FUNCTION aplicar_delta_resumo_vendas(p_delta delta_item_venda[]) RETURNS VOID AS $$
+BEGIN
+    INSERT INTO vendas_produto AS vp (id_produto, total_vendido, faturamento)
+    SELECT id_produto, SUM(sinal * quantidade), SUM(sinal * subtotal)
+    FROM unnest(p_delta)
+    GROUP BY id_produto
+    ON CONFLICT (id_produto) DO UPDATE
+        SET total_vendido = vp.total_vendido + EXCLUDED.total_vendido,
+            faturamento = vp.faturamento + EXCLUDED.faturamento;
+
+    WITH itens_mes_produto AS (
+        SELECT periodo, id_produto, SUM(sinal)::INTEGER AS itens
+        FROM unnest(p_delta)
+        WHERE periodo IS NOT NULL
+        GROUP BY periodo, id_produto
+        HAVING SUM(sinal) <> 0
+    ), contadores AS (
+        INSERT INTO vendas_mensais_produto AS vmp (periodo, id_produto, itens)
+        SELECT periodo, id_produto, itens FROM itens_mes_produto
+        ON CONFLICT (periodo, id_produto) DO UPDATE
+            SET itens = vmp.itens + EXCLUDED.itens
+        RETURNING vmp.periodo, vmp.id_produto, vmp.itens
+    ), produtos AS (
+        SELECT c.periodo,
+            SUM(CASE WHEN c.itens > 0 AND c.itens = d.itens THEN 1
+                     WHEN c.itens = 0 THEN -1
+                     ELSE 0 END) AS produtos_diferentes
+        FROM contadores c
+        JOIN itens_mes_produto d USING (periodo, id_produto)
+        GROUP BY c.periodo
+    ), itens_mes_pedido AS (
+        SELECT periodo, id_pedido, SUM(sinal)::INTEGER AS itens
+        FROM unnest(p_delta)
+        WHERE periodo IS NOT NULL
+        GROUP BY periodo, id_pedido
+        HAVING SUM(sinal) <> 0
+    ), pedidos AS (
+        SELECT d.periodo,
+            SUM(CASE WHEN atual.itens > 0 AND atual.itens = d.itens THEN 1
+                     WHEN atual.itens = 0 THEN -1
+                     ELSE 0 END) AS total_pedidos
+        FROM itens_mes_pedido d
+        CROSS JOIN LATERAL (
+            SELECT COUNT(*)::INTEGER AS itens
+            FROM itens_pedido ip
+            WHERE ip.id_pedido = d.id_pedido
+              AND ip.data_pedido >= d.periodo
+              AND ip.data_pedido < d.periodo + INTERVAL '1 month'
+        ) atual
+        GROUP BY d.periodo
+    ), faturamento AS (
+        SELECT periodo, SUM(sinal * subtotal) AS faturamento_total
+        FROM unnest(p_delta)
+        WHERE periodo IS NOT NULL
+        GROUP BY periodo
+    )
+    INSERT INTO vendas_mensais AS vm (periodo, total_pedidos, produtos_diferentes, faturamento_total)
+    SELECT f.periodo, COALESCE(pe.total_pedidos, 0), COALESCE(pr.produtos_diferentes, 0), f.faturamento_total
+    FROM faturamento f
+    LEFT JOIN pedidos pe USING (periodo)
+    LEFT JOIN produtos pr USING (periodo)
+    ON CONFLICT (periodo) DO UPDATE
+        SET total_pedidos = vm.total_pedidos + EXCLUDED.total_pedidos,
+            produtos_diferentes = vm.produtos_diferentes + EXCLUDED.produtos_diferentes,
+            faturamento_total = vm.faturamento_total + EXCLUDED.faturamento_total;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Uma chamada por comando (trigger de statement com transition tables),
+-- então um INSERT de milhares de itens atualiza os resumos de uma vez só.
+-- O mês vem do próprio item; quando o pedido muda de data, o ON UPDATE CASCADE
+-- atualiza os itens e este mesmo trigger move os resumos de mês.
+CREATE OR REPLACE FUNCTION atualizar_resumo_vendas_itens() RETURNS TRIGGER AS $$
+DECLARE
+    delta delta_item_venda[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        delta := ARRAY(
+            SELECT ROW(date_trunc('month', i.data_pedido)::DATE, i.id_pedido, i.id_produto, i.quantidade, i.subtotal, 1)::delta_item_venda
+            FROM itens_novos i);
+    ELSIF TG_OP = 'DELETE' THEN
+        delta := ARRAY(
+            SELECT ROW(date_trunc('month', i.data_pedido)::DATE, i.id_pedido, i.id_produto, i.quantidade, i.subtotal, -1)::delta_item_venda
+            FROM itens_antigos i);
+    ELSE
+        delta := ARRAY(
+            SELECT ROW(date_trunc('month', i.data_pedido)::DATE, i.id_pedido, i.id_produto, i.quantidade, i.subtotal, -1)::delta_item_venda
+            FROM itens_antigos i
+            UNION ALL
+            SELECT ROW(date_trunc('month', i.data_pedido)::DATE, i.id_pedido, i.id_produto, i.quantidade, i.subtotal, 1)::delta_item_venda
+            FROM itens_novos i);
+    END IF;
+    PERFORM aplicar_delta_resumo_vendas(delta);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_resumo_vendas_itens_insert
+    AFTER INSERT ON itens_pedido
+    REFERENCING NEW TABLE AS itens_novos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_vendas_itens();
+
+CREATE TRIGGER trg_resumo_vendas_itens_update
+    AFTER UPDATE ON itens_pedido
+    REFERENCING OLD TABLE AS itens_antigos NEW TABLE AS itens_novos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_vendas_itens();
+
+CREATE TRIGGER trg_resumo_vendas_itens_delete
+    AFTER DELETE ON itens_pedido
+    REFERENCING OLD TABLE AS itens_antigos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_vendas_itens();
+
+-- Reconstrói os resumos do zero (usar depois de cargas com os triggers desligados).
+-- Refaz também usuario_estatisticas, que depende dos mesmos triggers de pedido.
+CREATE OR REPLACE FUNCTION recalcular_resumos_vendas() RETURNS VOID AS $$
+BEGIN
+    TRUNCATE vendas_produto, vendas_mensais_produto, vendas_mensais;
+
+    INSERT INTO vendas_produto (id_produto, total_vendido, faturamento)
+    SELECT id_produto, SUM(quantidade), SUM(subtotal)
+    FROM itens_pedido
+    GROUP BY id_produto;
+
+    INSERT INTO vendas_mensais_produto (periodo, id_produto, itens)
+    SELECT date_trunc('month', data_pedido)::DATE, id_produto, COUNT(*)
+    FROM itens_pedido
+    GROUP BY 1, 2;
+
+    INSERT INTO vendas_mensais (periodo, total_pedidos, produtos_diferentes, faturamento_total)
+    SELECT date_trunc('month', data_pedido)::DATE,
+        COUNT(DISTINCT id_pedido),
+        COUNT(DISTINCT id_produto),
+        SUM(subtotal)
+    FROM itens_pedido
+    GROUP BY 1;
+
+    PERFORM recalcular_usuario_estatisticas();
+END;
+$$ LANGUAGE plpgsql;
+
+-- ==========================================
+-- ESTATÍSTICAS POR CLIENTE
+-- ==========================================
+
+-- O relatório 12 lê esta tabela em vez de agregar pedido inteiro a cada chamada.
+-- Pedidos cancelados não contam; o valor médio é valor_total_gasto / quantidade_pedidos.
+CREATE TABLE usuario_estatisticas (
+    id_usuario INTEGER PRIMARY KEY,
+    quantidade_pedidos INTEGER NOT NULL DEFAULT 0,
+    valor_total_gasto DECIMAL(14,2) NOT NULL DEFAULT 0,
+
+    CONSTRAINT fk_usuario_estatisticas FOREIGN KEY (id_usuario)
+        REFERENCES usuario(id_usuario) ON DELETE CASCADE
 );
 
+-- Variação de um pedido nas estatísticas do cliente: sinal = 1 entra, -1 sai
+CREATE TYPE delta_usuario_estatisticas AS (
+    id_usuario INTEGER,
+    valor_total DECIMAL(12,2),
+    sinal INTEGER
+);
+
+CREATE OR REPLACE FUNCTION aplicar_delta_usuario_estatisticas(p_delta delta_usuario_estatisticas[]) RETURNS VOID AS $$
+BEGIN
+    INSERT INTO usuario_estatisticas AS ue (id_usuario, quantidade_pedidos, valor_total_gasto)
+    SELECT id_usuario, SUM(sinal), SUM(sinal * valor_total)
+    FROM unnest(p_delta)
+    GROUP BY id_usuario
+    HAVING SUM(sinal) <> 0 OR SUM(sinal * valor_total) <> 0
+    ON CONFLICT (id_usuario) DO UPDATE
+        SET quantidade_pedidos = ue.quantidade_pedidos + EXCLUDED.quantidade_pedidos,
+            valor_total_gasto = ue.valor_total_gasto + EXCLUDED.valor_total_gasto;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Um UPDATE tira a versão antiga do pedido e põe a nova, o que cobre mudança de
+-- valor_total, de cliente e cancelamento (o pedido cancelado simplesmente não entra)
+CREATE OR REPLACE FUNCTION atualizar_usuario_estatisticas() RETURNS TRIGGER AS $$
+DECLARE
+    delta delta_usuario_estatisticas[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        delta := ARRAY(
+            SELECT ROW(p.id_usuario, p.valor_total, 1)::delta_usuario_estatisticas
+            FROM pedidos_novos p WHERE p.status_pedido <> 'cancelado');
+    ELSIF TG_OP = 'DELETE' THEN
+        delta := ARRAY(
+            SELECT ROW(p.id_usuario, p.valor_total, -1)::delta_usuario_estatisticas
+            FROM pedidos_antigos p WHERE p.status_pedido <> 'cancelado');
+    ELSE
+        delta := ARRAY(
+            SELECT ROW(p.id_usuario, p.valor_total, -1)::delta_usuario_estatisticas
+            FROM pedidos_antigos p WHERE p.status_pedido <> 'cancelado'
+            UNION ALL
+            SELECT ROW(p.id_usuario, p.valor_total, 1)::delta_usuario_estatisticas
+            FROM pedidos_novos p WHERE p.status_pedido <> 'cancelado');
+    END IF;
+    PERFORM aplicar_delta_usuario_estatisticas(delta);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_usuario_estatisticas_insert
+    AFTER INSERT ON pedido
+    REFERENCING NEW TABLE AS pedidos_novos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_usuario_estatisticas();
+
+CREATE TRIGGER trg_usuario_estatisticas_update
+    AFTER UPDATE ON pedido
+    REFERENCING OLD TABLE AS pedidos_antigos NEW TABLE AS pedidos_novos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_usuario_estatisticas();
+
+CREATE TRIGGER trg_usuario_estatisticas_delete
+    AFTER DELETE ON pedido
+    REFERENCING OLD TABLE AS pedidos_antigos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_usuario_estatisticas();
+
+CREATE OR REPLACE FUNCTION recalcular_usuario_estatisticas() RETURNS VOID AS $$
+BEGIN
+    TRUNCATE usuario_estatisticas;
+
+    INSERT INTO usuario_estatisticas (id_usuario, quantidade_pedidos, valor_total_gasto)
+    SELECT id_usuario, COUNT(*), SUM(valor_total)
+    FROM pedido
+    WHERE status_pedido <> 'cancelado'
+    GROUP BY id_usuario;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Inserir usuários
 INSERT INTO usuario (nome, email, telefone, endereco, data_nascimento) VALUES
 ('João Silva', 'joao.silva@email.com', '(11) 99999-1111', 'Rua A, 123, São Paulo - SP', '1990-05-15'),
@@ -111,10 +600,14 @@ INSERT INTO pedido (id_usuario, endereco_entrega, observacoes) VALUES
 (2, 'Av. B, 456, São Paulo - SP', 'Apartamento 302'),
 (1, 'Rua A, 123, São Paulo - SP', 'Presente de aniversário');
 
--- Inserir itens dos pedidos
-INSERT INTO itens_pedido (id_pedido, id_produto, quantidade, preco_unitario) VALUES
-(1, 1, 1, 1200.00),  -- João comprou 1 Smartphone
-(1, 5, 2, 120.00),   -- João comprou 2 Mouses
-(2, 2, 1, 2500.00),  -- Maria comprou 1 Notebook
-(2, 3, 1, 350.00),   -- Maria comprou 1 Tênis
-(3, 4, 3, 89.90);    -- João comprou 3 Livros
\ No newline at end of file
+-- Inserir itens dos pedidos (a data vem do pedido, para o item cair na mesma partição)
+INSERT INTO itens_pedido (id_pedido, data_pedido, id_produto, quantidade, preco_unitario)
+SELECT p.id_pedido, p.data_pedido, i.id_produto, i.quantidade, i.preco_unitario
+FROM (VALUES
+    (1, 1, 1, 1200.00),  -- João comprou 1 Smartphone
+    (1, 5, 2, 120.00),   -- João comprou 2 Mouses
+    (2, 2, 1, 2500.00),  -- Maria comprou 1 Notebook
+    (2, 3, 1, 350.00),   -- Maria comprou 1 Tênis
+    (3, 4, 3, 89.90)     -- João comprou 3 Livros
+) AS i (id_pedido, id_produto, quantidade, preco_unitario)
+JOIN pedido p ON p.id_pedido = i.id_pedido;
\ No newline at end of file
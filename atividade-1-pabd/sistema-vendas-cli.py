@@ -1,20 +1,72 @@
+import argparse
+import json
 import os
+import select
 import sys
-from typing import Optional
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Iterator, Optional
 import psycopg2
 from psycopg2 import sql
+from psycopg2.pool import ThreadedConnectionPool
 from tabulate import tabulate
 
-DB_CONFIG = {
-    'host': '127.0.0.1',
-    'user': 'postgres',
-    'password': 'postgres',
-    'database': 'postgres'
-}
+from config import DB_CONFIG
+from consultas import CONSULTAS, Consulta, buscar_consulta, executar_preparada
+from estatisticas_consultas import LIMITE_PADRAO, ORDENACOES, ler_estatisticas, resetar
+from exportacao import FORMATOS, exportar, formato_do_arquivo
+from renderizador import linhas_das_paginas, renderizar
+from snapshot_vendas import RELATORIOS as RELATORIOS_SNAPSHOT, SnapshotVendas
+from perfil_consultas import (
+    ARQUIVO_BASELINE_PADRAO, ARQUIVO_ULTIMO_PADRAO, EXPLAIN_PREFIXO,
+    carregar_perfis, comparar, resumir_plano, salvar_perfis,
+)
+
+# quantidade de linhas trazidas do servidor por vez no modo streaming
+ITERSIZE_PADRAO = 2000
+
+# acima disso o resultado é desenhado linha a linha (renderizador.py) em vez do tabulate,
+# que monta a tabela inteira numa string antes de imprimir
+LIMITE_TABULATE = 1000
+
+# conexões abertas em paralelo no modo lote (uma por consulta em execução)
+CONEXOES_LOTE_PADRAO = 8
+
+# canal em que os triggers do setup.sql avisam que usuario/produto/pedido/itens_pedido mudaram
+CANAL_ALTERACOES = "vendas_alteracoes"
+
+# canal dos alertas de estoque (trigger notificar_estoque_baixo do setup.sql)
+CANAL_ESTOQUE = "estoque_baixo"
+
+# de quanto em quanto tempo o modo monitor acorda mesmo sem notificação (segundos)
+INTERVALO_MONITOR = 5.0
+
+# aparece no pg_stat_activity para identificar as conexões da CLI
+NOME_APLICACAO = "sistema-vendas-cli"
+
+# tamanho do trecho da query exibido no painel do pg_stat_statements
+LARGURA_QUERY_PAINEL = 60
 
 class SistemaVendasCLI:
-    def __init__(self):
+    def __init__(self, modo_streaming: bool = False, itersize: int = ITERSIZE_PADRAO, usar_cache: bool = True,
+                 modo_perfil: bool = False, arquivo_baseline: str = ARQUIVO_BASELINE_PADRAO,
+                 modo_snapshot: bool = False):
         self.conexao = None
+        self.modo_streaming = modo_streaming
+        self.itersize = itersize
+        self.usar_cache = usar_cache
+        # (numero da consulta, parametros, dia) -> (colunas, linhas)
+        self.cache: dict[tuple, tuple[list[str], list[tuple]]] = {}
+        self.modo_perfil = modo_perfil
+        self.arquivo_baseline = arquivo_baseline
+        # nome da consulta -> resumo do último EXPLAIN ANALYZE
+        self.perfis: dict[str, dict] = {}
+        # cópia em memória de pedido/itens_pedido/produto, carregada na primeira consulta do modo snapshot
+        self.modo_snapshot = modo_snapshot
+        self.snapshot: Optional[SnapshotVendas] = None
         print("Sistema de Vendas - CLI Inicializado")
         print("=" * 50)
     
@@ -24,12 +76,15 @@ class SistemaVendasCLI:
                 host=DB_CONFIG['host'],
                 user=DB_CONFIG['user'],
                 password=DB_CONFIG['password'],
-                database=DB_CONFIG['database']
+                database=DB_CONFIG['database'],
+                application_name=NOME_APLICACAO
             )
             
             print("Conectando ao banco PostgreSQL...")
             #self.conexao = psycopg2.connect(**pg_config)
             self.conexao.autocommit = True
+            with self.conexao.cursor() as cursor:
+                cursor.execute(f"LISTEN {CANAL_ALTERACOES};")
             print("Conexão estabelecida com sucesso!")
             return True
         except psycopg2.Error as e:
@@ -45,17 +100,40 @@ class SistemaVendasCLI:
             self.conexao.close()
             print("Conexão com o banco de dados encerrada.")
 
-    def executar_query(self, sql: str) -> tuple[list[str], list[tuple]]:
-        with self.conexao.cursor() as cursor:
-            cursor.execute(sql)
-            if cursor.description:
-                colunas = [desc[0] for desc in cursor.description]
-                linhas = cursor.fetchall()
-                return colunas, linhas
-            return [], []
+    @contextmanager
+    def _transacao_leitura(self):
+        """Cursores nomeados (server-side) só existem dentro de uma transação,
+        então o autocommit é desligado enquanto o cursor estiver aberto"""
+        autocommit = self.conexao.autocommit
+        self.conexao.autocommit = False
+        try:
+            yield
+        finally:
+            # só leitura: não há nada para confirmar
+            self.conexao.rollback()
+            self.conexao.autocommit = autocommit
+
+    def executar_query_stream(self, sql: str, parametros: Optional[dict] = None,
+                              itersize: Optional[int] = None) -> Iterator[tuple[list[str], list[tuple]]]:
+        """Executa a query num cursor server-side e devolve o resultado página por página,
+        sem nunca trazer todas as linhas para a memória"""
+        itersize = itersize or self.itersize
+        with self._transacao_leitura():
+            with self.conexao.cursor(name=f"stream_{uuid.uuid4().hex}") as cursor:
+                cursor.itersize = itersize
+                cursor.execute(sql, parametros)
+                while True:
+                    pagina = cursor.fetchmany(itersize)
+                    if not pagina:
+                        break
+                    colunas = [desc[0] for desc in cursor.description]
+                    yield colunas, pagina
         
     def exibir_resultado(self, colunas: list[str], linhas: list[tuple], descricao: str = "") -> None:
-        if linhas:
+        if len(linhas) > LIMITE_TABULATE:
+            renderizar(colunas, linhas, descricao)
+            print(f"{len(linhas)} linha(s)")
+        elif linhas:
             tabela = tabulate(linhas, headers=colunas, tablefmt="fancy_grid", showindex=False)
             largura_tabela = len(tabela.splitlines()[0])
             print(descricao.center(largura_tabela))
@@ -64,199 +142,207 @@ class SistemaVendasCLI:
             print(descricao.center(50))
             print("consulta realizada com sucesso, mas sem retorno")
                         
-    def executar_consulta(self, sql: str, descricao: str) -> None:
-        coluna, linha = self.executar_query(sql)
-        self.exibir_resultado(coluna, linha, descricao)
-    
+    def exibir_resultado_stream(self, paginas: Iterator[tuple[list[str], list[tuple]]], descricao: str = "") -> None:
+        """As larguras saem da primeira página; as seguintes são impressas conforme chegam do servidor"""
+        colunas, linhas = linhas_das_paginas(paginas)
+        total = renderizar(colunas, linhas, descricao) if colunas else 0
+        if total:
+            print(f"{total} linha(s) lidas em páginas de até {self.itersize}")
+        else:
+            print(descricao.center(50))
+            print("consulta realizada com sucesso, mas sem retorno")
+
     # ========================================
-    # FUNCOES COM CONSULTAS SQL
+    # CONSULTAS DO CATÁLOGO
     # ========================================
-    
-    def consulta_01_usuarios_ativos(self):
-        """1. Listagem de Usuários Ativos"""
-        sql = """
-        SELECT id_usuario, nome, email, telefone
-        FROM usuario
-        WHERE ativo = TRUE;
-        """
-        self.executar_consulta(sql, "1. Listagem de Usuários Ativos")
-    
-    def consulta_02_produtos_categoria(self):
-        """2. Listagem de Produtos da Categoria Informática"""
-        sql = """
-        SELECT nome, preco, quantidade_estoque
-        FROM produto
-        WHERE categoria = 'Informática'
-        ORDER BY preco ASC;
-        """
-        self.executar_consulta(sql, "2. Listagem de Produtos da Categoria Informática")
-    
-    def consulta_03_pedidos_status(self):
-        """3. Quantidade de Pedidos para cada Status Diferente"""
-        sql = """
-        SELECT status_pedido, COUNT(*) AS quantidade_pedidos
-        FROM pedido
-        GROUP BY status_pedido;
-        """
-        self.executar_consulta(sql, "3. Quantidade de Pedidos para cada Status Diferente")
-    
-    def consulta_04_estoque_baixo(self):
-        """4. Listagem de Produtos com Quantidade em Estoque Menor que 30 Unidades"""
-        sql = """
-        SELECT nome, quantidade_estoque, categoria
-        FROM produto
-        WHERE quantidade_estoque < 30;
-        """
-        self.executar_consulta(sql, "4. Listagem de Produtos com Quantidade em Estoque Menor que 30 Unidades")
-    
-    def consulta_05_pedidos_recentes(self):    
-        """5. Listagem de Pedidos Realizados nos Últimos 60 Dias"""
-        sql = """
-        SELECT id_pedido, TO_CHAR(data_pedido, 'DD-MM-YYYY') AS data_pedido, valor_total, status_pedido
-        FROM pedido
-        WHERE data_pedido >= CURRENT_DATE - INTERVAL '60 day';
-        """
-        self.executar_consulta(sql, "5. Listagem de Pedidos Realizados nos Últimos 60 Dias")
-    
-    def consulta_06_produtos_caros_categoria(self):
-        """6. Listagem de Produto Mais Caro da Categoria"""
-
-        """
-        O PARTITION BY vai criar novas tabelinhas com base na categoria
-        cada uma dessas tabelinhas vai ser ordenada (ORDER BY) pelo preco, deixando o mais caro no topo
-        o ROW_NUMBER() OVER vai colocar especies de ranks, que vão ser chamados de posicao
-        com o WHERE posicao = 1, a gente pega os primeiros ranks
-        
-        como so tem 1 primeiro rank por categoria, e os primeiros ranks sao os mais caros
-        ele seleciona o mais caro de cada categoria"""
-
-        sql = """
-        SELECT nome, preco
-        FROM (
-            SELECT *,
-                ROW_NUMBER() OVER (PARTITION BY categoria ORDER BY preco DESC) AS posicao
-            FROM produto
-        ) sub
-        WHERE posicao = 1;
-        """
-        self.executar_consulta(sql, "6. Listagem de Produto Mais Caro da Categoria")
-    
-    def consulta_07_contatos_incompletos(self):
-        """7. Listagem de Usuários Ativos que não Possuem Telefone Cadastrado"""
-        sql = """
-        SELECT *
-        FROM usuario
-        WHERE telefone IS NULL;
-        """
-        self.executar_consulta(sql, "7. Listagem de Usuários Ativos que não Possuem Telefone Cadastrado")
-    
-    def consulta_08_pedidos_enviados(self):
-        """8. Listagem de Pedidos com Status 'Enviado'"""
-        sql = """
-        SELECT 
-            u.nome AS nome_usuario,
-            u.email AS email_usuario,
-            u.telefone AS telefone_usuario,
-            p.endereco_entrega
-        FROM pedido p
-        JOIN usuario u ON p.id_usuario = u.id_usuario
-        WHERE p.status_pedido = 'enviado';
-        """
-        self.executar_consulta(sql, "8. Listagem de Pedidos com Status 'Enviado'")
-    
-    def consulta_09_detalhamento_pedido(self):
-        """9. Listagem de Todas as Informações de um Pedido"""
-        sql = """
-        SELECT
-            u.nome AS nome_cliente,
-            u.email AS email_cliente,
-            u.telefone AS telefone_cliente,
-            pr.nome AS produto_comprado,
-            ip.quantidade,
-            ip.preco_unitario,
-            ip.subtotal
-        FROM pedido p
-        JOIN usuario u ON p.id_usuario = u.id_usuario
-        JOIN itens_pedido ip ON ip.id_pedido = p.id_pedido
-        JOIN produto pr ON ip.id_produto = pr.id_produto;
-        """
-        self.executar_consulta(sql, "9. Listagem de Todas as Informações de um Pedido")
-    
-    def consulta_10_ranking_produtos(self):
-        """10. Listagem de Produtos Ordenado pela Quantidade Total Vendida"""
-        sql = """
-        SELECT p.nome, p.categoria, SUM(ip.quantidade) AS total_vendido
-        FROM produto p
-        JOIN itens_pedido ip ON ip.id_produto = p.id_produto
-        GROUP BY p.nome, p.categoria
-        ORDER BY total_vendido DESC;
-        """
-        self.executar_consulta(sql, "10. Listagem de Produtos Ordenado pela Quantidade Total Vendida")
-    
-    def consulta_11_clientes_sem_compras(self):
-        """11. Listagem de Usuários Ativos que Nunca Fizeram um Pedido no Sistema"""
-        sql = """
-        SELECT u.id_usuario, u.nome, u.email, u.telefone
-        FROM usuario u
-        JOIN pedido p ON p.id_usuario = u.id_usuario
-        WHERE u.ativo = TRUE
-        GROUP BY u.id_usuario, u.nome, u.email, u.telefone
-        HAVING COUNT(p.id_pedido) = 0;
-        """
-        self.executar_consulta(sql, "11. Listagem de Usuários Ativos que Nunca Fizeram um Pedido no Sistema")
-    
-    def consulta_12_estatisticas_cliente(self):
-        """12. Listagem de Número Total de Pedidos, Valor Médio por Pedido e Valor Total Gasto"""
-        sql = """
-        SELECT u.nome, 
-            COUNT(p.id_pedido) AS quantidade_pedidos, 
-            AVG(p.valor_total) AS valor_medio_por_pedido,
-            SUM(p.valor_total) AS valor_total_gasto
-        FROM usuario u
-        JOIN pedido p ON p.id_usuario = u.id_usuario
-        GROUP BY u.nome
-        ORDER BY valor_total_gasto DESC;
-        """
-        self.executar_consulta(sql, "12. Listagem de Número Total de Pedidos, Valor Médio por Pedido e Valor Total Gasto")
-    
-    def consulta_13_relatorio_mensal(self):
-        """13. Listagem de Vendas por Mês/Ano"""
-        sql = """
-        SELECT TO_CHAR(p.data_pedido, 'YYYY-MM') AS periodo,
-            COUNT(DISTINCT p.id_pedido) AS total_pedidos,
-            COUNT(DISTINCT ip.id_produto) AS produtos_diferentes_vendidos,
-            SUM(ip.subtotal) AS faturamento_total
-        FROM pedido p
-        JOIN itens_pedido ip ON ip.id_pedido = p.id_pedido
-        GROUP BY TO_CHAR(p.data_pedido, 'YYYY-MM')
-        ORDER BY periodo;
-        """
-        self.executar_consulta(sql, "13. Listagem de Vendas por Mês/Ano")
-    
-    def consulta_14_produtos_nao_vendidos(self):
-        """14. Listagem de Produtos Ativos que Nunca Foram Incluídos em Nenhum Pedido"""
-        sql = """
-        SELECT p.id_produto, p.nome
-        FROM produto p
-        JOIN itens_pedido ip ON ip.id_produto = p.id_produto
-        WHERE p.ativo = TRUE
-        GROUP BY p.id_produto, p.nome
-        HAVING COUNT(ip.id_item) = 0;
-        """
-        self.executar_consulta(sql, "14. Listagem de Produtos Ativos que Nunca Foram Incluídos em Nenhum Pedido")
-    
-    def consulta_15_ticket_medio_categoria(self):
-        """15. Listagem de Ticket Médio para Cada Categoria de Produto"""
-        sql = """
-        SELECT p.categoria, AVG(ip.subtotal) AS ticket_medio
-        FROM produto p
-        JOIN itens_pedido ip ON ip.id_produto = p.id_produto
-        JOIN pedido pe ON pe.id_pedido = ip.id_pedido
-        WHERE pe.status_pedido != 'cancelado'
-        GROUP BY p.categoria;
-        """
-        self.executar_consulta(sql, "15. Listagem de Ticket Médio para Cada Categoria de Produto")
-    
+
+    def executar_preparada(self, consulta: Consulta, valores: dict) -> tuple[list[str], list[tuple]]:
+        return executar_preparada(self.conexao, consulta, valores)
+
+    def processar_notificacoes(self) -> None:
+        """Lê os NOTIFY pendentes: alterações de tabela tiram do cache o que depende
+        delas e alertas de estoque são exibidos"""
+        self.conexao.poll()
+        while self.conexao.notifies:
+            notificacao = self.conexao.notifies.pop(0)
+            if notificacao.channel == CANAL_ALTERACOES:
+                self.invalidar_cache(notificacao.payload)
+                if self.snapshot and notificacao.payload in SnapshotVendas.TABELAS:
+                    self.snapshot.desatualizado = True
+            elif notificacao.channel == CANAL_ESTOQUE:
+                self.exibir_alerta_estoque(json.loads(notificacao.payload))
+
+    def invalidar_cache(self, tabela: str) -> None:
+        for chave in [chave for chave in self.cache if tabela in CONSULTAS[chave[0]].tabelas]:
+            del self.cache[chave]
+
+    def exibir_alerta_estoque(self, alerta: dict) -> None:
+        agora = datetime.now().strftime("%H:%M:%S")
+        situacao = "ESTOQUE BAIXO" if alerta["evento"] == "baixo" else "estoque normalizado"
+        print(f"[{agora}] {situacao}: {alerta['nome']} (id {alerta['id_produto']}) "
+              f"com {alerta['quantidade_estoque']} unidade(s), limite {alerta['limite']}")
+
+    def monitorar_estoque(self) -> None:
+        """Fica escutando o canal de estoque e mostra cada alerta assim que ele chega.
+        O select() dorme até o servidor mandar algo, então não há consulta repetida"""
+        with self.conexao.cursor() as cursor:
+            cursor.execute(f"LISTEN {CANAL_ESTOQUE};")
+        print("Monitorando alertas de estoque (Ctrl-C para sair)...")
+        try:
+            while True:
+                prontos, _, _ = select.select([self.conexao], [], [], INTERVALO_MONITOR)
+                if prontos:
+                    self.processar_notificacoes()
+        except KeyboardInterrupt:
+            print("\nMonitoramento encerrado.")
+        finally:
+            with self.conexao.cursor() as cursor:
+                cursor.execute(f"UNLISTEN {CANAL_ESTOQUE};")
+
+    def atualizar_snapshot(self) -> SnapshotVendas:
+        if self.snapshot is None:
+            self.snapshot = SnapshotVendas()
+        self.snapshot.carregar(self.conexao)
+        print(f"Snapshot carregado: {len(self.snapshot.pedido['id_pedido'])} pedido(s), "
+              f"{len(self.snapshot.itens['id_pedido'])} item(ns) em {self.snapshot.tempo_carga_s:.2f} s")
+        return self.snapshot
+
+    def consultar_snapshot(self, consulta: Consulta) -> tuple[list[str], list[tuple]]:
+        """Responde a consulta em memória; o snapshot é lido do banco só na primeira vez"""
+        snapshot = self.snapshot if self.snapshot and self.snapshot.carregado else self.atualizar_snapshot()
+        self.processar_notificacoes()
+        inicio = time.perf_counter()
+        colunas, linhas = RELATORIOS_SNAPSHOT[consulta.numero](snapshot)
+        print(f"(respondida pelo snapshot de {snapshot.carregado_em:%H:%M:%S} "
+              f"em {(time.perf_counter() - inicio) * 1000:.2f} ms)")
+        if snapshot.desatualizado:
+            print("(o banco mudou desde a carga do snapshot; use A para recarregar)")
+        return colunas, linhas
+
+    def consultar_com_cache(self, consulta: Consulta, valores: dict) -> tuple[list[str], list[tuple], bool]:
+        """Devolve colunas, linhas e se o resultado veio do cache"""
+        if not self.usar_cache:
+            return *self.executar_preparada(consulta, valores), False
+        self.processar_notificacoes()
+        # o dia entra na chave porque algumas consultas usam CURRENT_DATE
+        chave = (consulta.numero, tuple(sorted(valores.items())), date.today())
+        if chave in self.cache:
+            return *self.cache[chave], True
+        resultado = self.executar_preparada(consulta, valores)
+        self.cache[chave] = resultado
+        return *resultado, False
+
+    # ========================================
+    # PERFIL (EXPLAIN ANALYZE)
+    # ========================================
+
+    def perfilar(self, consulta: Consulta, valores: dict) -> dict:
+        with self.conexao.cursor() as cursor:
+            cursor.execute(EXPLAIN_PREFIXO + consulta.sql, valores)
+            resumo = resumir_plano(cursor.fetchone()[0])
+        self.perfis[consulta.nome] = resumo
+        return resumo
+
+    def exibir_perfil(self, descricao: str, resumo: dict) -> None:
+        print(descricao)
+        print(f"Planejamento: {resumo['planejamento_ms']:.3f} ms | Execução: {resumo['execucao_ms']:.3f} ms | "
+              f"Buffers hit: {resumo['buffers_hit']} | Buffers read: {resumo['buffers_read']}")
+        linhas = [(n["no"], n["custo"], round(n["tempo_ms"], 3), n["linhas"]) for n in resumo["nos_mais_caros"]]
+        print(tabulate(linhas, headers=["nó", "custo", "tempo_ms", "linhas"], tablefmt="fancy_grid"))
+
+    def exibir_alertas(self, perfis: dict[str, dict]) -> None:
+        baseline = carregar_perfis(self.arquivo_baseline)
+        if not baseline:
+            print(f"Sem baseline em {self.arquivo_baseline} para comparar.")
+            return
+        alertas = comparar(perfis, baseline)
+        if alertas:
+            print("Mudanças em relação à baseline:")
+            for alerta in alertas:
+                print(f"  ! {alerta}")
+        else:
+            print("Nenhuma mudança de plano em relação à baseline.")
+
+    def perfilar_todas(self, salvar_baseline: bool = False) -> dict[str, dict]:
+        """Roda todas as consultas do catálogo sob EXPLAIN ANALYZE, mostra o resumo,
+        compara com a baseline e grava os planos"""
+        perfis = {}
+        for consulta in CONSULTAS.values():
+            perfis[consulta.nome] = self.perfilar(consulta, consulta.valores())
+        linhas = [
+            (nome, round(r["planejamento_ms"], 3), round(r["execucao_ms"], 3), r["buffers_hit"], r["buffers_read"],
+             r["nos_mais_caros"][0]["no"])
+            for nome, r in perfis.items()
+        ]
+        print(tabulate(linhas, headers=["consulta", "planejamento_ms", "execucao_ms", "hit", "read", "nó mais caro"],
+                       tablefmt="fancy_grid"))
+        self.exibir_alertas(perfis)
+        salvar_perfis(perfis, ARQUIVO_ULTIMO_PADRAO)
+        if salvar_baseline:
+            salvar_perfis(perfis, self.arquivo_baseline)
+            print(f"Baseline gravada em {self.arquivo_baseline}")
+        return perfis
+
+    def executar_registrada(self, numero: int, **parametros) -> None:
+        consulta = buscar_consulta(numero)
+        valores = consulta.valores(**parametros)
+        descricao = consulta.cabecalho(valores)
+        if self.modo_perfil:
+            resumo = self.perfilar(consulta, valores)
+            self.exibir_perfil(descricao, resumo)
+            self.exibir_alertas({consulta.nome: resumo})
+            return
+        if self.modo_snapshot and consulta.numero in RELATORIOS_SNAPSHOT:
+            self.exibir_resultado(*self.consultar_snapshot(consulta), descricao)
+            return
+        if self.modo_streaming:
+            # DECLARE ... CURSOR não aceita EXECUTE, então o streaming usa o SQL com bind parameters
+            self.exibir_resultado_stream(self.executar_query_stream(consulta.sql, valores), descricao)
+            return
+        colunas, linhas, do_cache = self.consultar_com_cache(consulta, valores)
+        self.exibir_resultado(colunas, linhas, descricao)
+        if do_cache:
+            print("(resultado servido do cache)")
+
+    def exportar_registrada(self, numero: int, arquivo: str, formato: Optional[str] = None, **parametros) -> int:
+        consulta = buscar_consulta(numero)
+        valores = consulta.valores(**parametros)
+        formato = formato or formato_do_arquivo(arquivo)
+        inicio = time.perf_counter()
+        linhas = exportar(self.conexao, consulta, valores, arquivo, formato)
+        print(consulta.cabecalho(valores))
+        print(f"{linhas} linha(s) exportadas para {arquivo} ({formato}) em {time.perf_counter() - inicio:.2f} s")
+        return linhas
+
+    def exibir_estatisticas(self, ordem: str = "total", limite: int = LIMITE_PADRAO,
+                            apenas_catalogo: bool = True) -> None:
+        """Top statements do pg_stat_statements, com a consulta do catálogo que emitiu cada um"""
+        estatisticas = ler_estatisticas(self.conexao, ordem, limite, apenas_catalogo)
+        if not estatisticas:
+            print("Nenhuma estatística coletada ainda.")
+            return
+        linhas = [
+            (e["consulta"] or "-", e["calls"], round(e["total_exec_time"], 3), round(e["mean_exec_time"], 3),
+             e["rows"], "-" if e["taxa_hit"] is None else f"{e['taxa_hit']:.1%}",
+             " ".join(e["query"].split())[:LARGURA_QUERY_PAINEL])
+            for e in estatisticas
+        ]
+        print(tabulate(linhas, headers=["consulta", "chamadas", "total_ms", "media_ms", "linhas", "hit", "query"],
+                       tablefmt="fancy_grid"))
+
+    def resetar_estatisticas(self) -> None:
+        resetar(self.conexao)
+        print("Estatísticas do pg_stat_statements zeradas.")
+
+    def ler_parametros(self, consulta: Consulta) -> dict:
+        parametros = {}
+        for parametro in consulta.parametros:
+            padrao = "" if parametro.opcional else parametro.padrao
+            valor = input(f"{parametro.descricao} [{padrao}]: ").strip()
+            if valor:
+                parametros[parametro.nome] = valor
+        return parametros
+
     # ========================================
     # MENUS 
     # ======================================== 
@@ -264,68 +350,250 @@ class SistemaVendasCLI:
         """MENU"""
         while True:            
             print("=" * 40)
-            print("1. Listagem de Usuários Ativos")
-            print("2. Catálogo de Produtos por Categoria")
-            print("3. Contagem de Pedidos por Status")
-            print("4. Alerta de Estoque Baixo")
-            print("5. Histórico de Pedidos Recentes")
-            print("6. Produtos Mais Caros por Categoria")
-            print("7. Clientes com Dados Incompletos")
-            print("8. Pedidos Pendentes de Entrega")
-            print("9. Detalhamento Completo de Pedidos")
-            print("10. Ranking dos Produtos Mais Vendidos")
-            print("11. Análise de Clientes Sem Compras")
-            print("12. Estatísticas de Compras por Cliente")
-            print("13. Relatório Mensal de Vendas")
-            print("14. Produtos que Nunca Foram Vendidos")
-            print("15. Análise de Ticket Médio por Categoria")            
+            for consulta in CONSULTAS.values():
+                print(f"{consulta.numero}. {consulta.titulo}")
+            print(f"S. Modo streaming: {'ligado' if self.modo_streaming else 'desligado'}")
+            print(f"C. Cache de resultados: {'ligado' if self.usar_cache else 'desligado'}")
+            print(f"P. Modo perfil (EXPLAIN ANALYZE): {'ligado' if self.modo_perfil else 'desligado'}")
+            print(f"R. Modo snapshot em memória (consultas {', '.join(map(str, RELATORIOS_SNAPSHOT))}): "
+                  f"{'ligado' if self.modo_snapshot else 'desligado'}")
+            print("A. Atualizar o snapshot")
+            print("T. Perfilar todas as consultas e comparar com a baseline")
+            print("B. Salvar os perfis atuais como baseline")
+            print(f"E. Exportar uma consulta para arquivo ({', '.join(FORMATOS)})")
+            print("M. Monitorar alertas de estoque baixo")
+            print("D. Painel do pg_stat_statements")
+            print("Z. Zerar as estatísticas do pg_stat_statements")
             print("0. Voltar ao Menu Principal")
             print("=" * 40)
             
             opcao = input("Escolha uma opção: ").strip()
             
-            if opcao == "1":
-                self.consulta_01_usuarios_ativos()
-            elif opcao == "2":
-                self.consulta_02_produtos_categoria()
-            elif opcao == "3":
-                self.consulta_03_pedidos_status()
-            elif opcao == "4":
-                self.consulta_04_estoque_baixo()
-            elif opcao == "5":
-                self.consulta_05_pedidos_recentes()
-            elif opcao == "6":
-                self.consulta_06_produtos_caros_categoria()
-            elif opcao == "7":
-                self.consulta_07_contatos_incompletos()
-            elif opcao == "8":
-                self.consulta_08_pedidos_enviados()
-            elif opcao == "9":
-                self.consulta_09_detalhamento_pedido()
-            elif opcao == "10":
-                self.consulta_10_ranking_produtos()
-            elif opcao == "11":
-                self.consulta_11_clientes_sem_compras()
-            elif opcao == "12":
-                self.consulta_12_estatisticas_cliente()
-            elif opcao == "13":
-                self.consulta_13_relatorio_mensal()
-            elif opcao == "14":
-                self.consulta_14_produtos_nao_vendidos()
-            elif opcao == "15":
-                self.consulta_15_ticket_medio_categoria()                
+            if opcao.upper() == "S":
+                self.modo_streaming = not self.modo_streaming
+                print(f"Modo streaming {'ligado' if self.modo_streaming else 'desligado'}.")
+                continue
+            elif opcao.upper() == "C":
+                self.usar_cache = not self.usar_cache
+                self.cache.clear()
+                print(f"Cache de resultados {'ligado' if self.usar_cache else 'desligado'}.")
+                continue
+            elif opcao.upper() == "P":
+                self.modo_perfil = not self.modo_perfil
+                print(f"Modo perfil {'ligado' if self.modo_perfil else 'desligado'}.")
+                continue
+            elif opcao.upper() == "R":
+                self.modo_snapshot = not self.modo_snapshot
+                print(f"Modo snapshot {'ligado' if self.modo_snapshot else 'desligado'}.")
+                continue
+            elif opcao.upper() == "A":
+                try:
+                    self.atualizar_snapshot()
+                except (ValueError, RuntimeError, psycopg2.Error) as e:
+                    print(f"Erro ao carregar o snapshot: {e}")
+            elif opcao.upper() == "T":
+                try:
+                    self.perfilar_todas()
+                except psycopg2.Error as e:
+                    print(f"Erro ao perfilar as consultas: {e}")
+            elif opcao.upper() == "B":
+                if self.perfis:
+                    salvar_perfis(self.perfis, self.arquivo_baseline)
+                    print(f"Baseline gravada em {self.arquivo_baseline}")
+                else:
+                    print("Nenhum perfil coletado ainda.")
+            elif opcao.upper() == "E":
+                numero = input("Número da consulta: ").strip()
+                if not (numero.isdigit() and int(numero) in CONSULTAS):
+                    print("Consulta inválida!")
+                else:
+                    consulta = CONSULTAS[int(numero)]
+                    arquivo = input(f"Arquivo de saída [{consulta.nome}.csv]: ").strip() or f"{consulta.nome}.csv"
+                    try:
+                        self.exportar_registrada(consulta.numero, arquivo, **self.ler_parametros(consulta))
+                    except (ValueError, RuntimeError, OSError, psycopg2.Error) as e:
+                        print(f"Erro ao exportar a consulta: {e}")
+            elif opcao.upper() == "M":
+                self.monitorar_estoque()
+            elif opcao.upper() == "D":
+                ordem = input(f"Ordenar por ({', '.join(ORDENACOES)}) [total]: ").strip() or "total"
+                try:
+                    self.exibir_estatisticas(ordem)
+                except (ValueError, RuntimeError, psycopg2.Error) as e:
+                    print(f"Erro ao ler o pg_stat_statements: {e}")
+            elif opcao.upper() == "Z":
+                try:
+                    self.resetar_estatisticas()
+                except (RuntimeError, psycopg2.Error) as e:
+                    print(f"Erro ao zerar o pg_stat_statements: {e}")
             elif opcao == "0":
                 break
+            elif opcao.isdigit() and int(opcao) in CONSULTAS:
+                consulta = CONSULTAS[int(opcao)]
+                try:
+                    self.executar_registrada(consulta.numero, **self.ler_parametros(consulta))
+                except (ValueError, RuntimeError, psycopg2.Error) as e:
+                    print(f"Erro ao executar a consulta: {e}")
             else:
                 print("Opção inválida!")
             
             input("\nPressione ENTER para continuar...")
 
+def _executar_no_pool(pool: ThreadedConnectionPool, consulta: Consulta) -> dict:
+    conexao = pool.getconn()
+    try:
+        conexao.autocommit = True
+        valores = consulta.valores()
+        inicio = time.perf_counter()
+        try:
+            colunas, linhas = executar_preparada(conexao, consulta, valores)
+        except psycopg2.Error as e:
+            return {"consulta": consulta.nome, "tempo_s": time.perf_counter() - inicio, "erro": str(e).strip()}
+        tempo = time.perf_counter() - inicio
+        return {
+            "consulta": consulta.nome,
+            "descricao": consulta.cabecalho(valores),
+            "parametros": valores,
+            "tempo_s": tempo,
+            "quantidade_linhas": len(linhas),
+            "colunas": colunas,
+            "linhas": linhas,
+        }
+    finally:
+        pool.putconn(conexao)
+
+
+def executar_lote(arquivo_saida: str, conexoes: int = CONEXOES_LOTE_PADRAO, assincrono: bool = False,
+                  timeout: Optional[float] = None) -> dict:
+    """Executa todas as consultas do catálogo ao mesmo tempo, cada uma na sua conexão
+    do pool, e grava tempos, contagens e resultados num único arquivo JSON.
+    Com assincrono=True usa o motor asyncio/psycopg 3 (motor_assincrono.py)"""
+    consultas = list(CONSULTAS.values())
+    conexoes = max(1, min(conexoes, len(consultas)))
+    inicio = time.perf_counter()
+    if assincrono:
+        # importado só aqui para o psycopg 3 não ser obrigatório no resto da CLI
+        from motor_assincrono import TIMEOUT_PADRAO, executar_lote_assincrono
+        resultados = executar_lote_assincrono(consultas, conexoes, TIMEOUT_PADRAO if timeout is None else timeout)
+    else:
+        pool = ThreadedConnectionPool(1, conexoes, **DB_CONFIG)
+        try:
+            with ThreadPoolExecutor(max_workers=conexoes) as executor:
+                resultados = list(executor.map(lambda consulta: _executar_no_pool(pool, consulta), consultas))
+        finally:
+            pool.closeall()
+    tempo_total = time.perf_counter() - inicio
+
+    relatorio = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "motor": "asyncio" if assincrono else "threads",
+        "conexoes": conexoes,
+        "tempo_total_s": tempo_total,
+        "soma_tempos_s": sum(r["tempo_s"] for r in resultados),
+        "consultas": resultados,
+    }
+    with open(arquivo_saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2, default=str)
+
+    for r in resultados:
+        situacao = f"{r['quantidade_linhas']} linha(s)" if "erro" not in r else f"ERRO: {r['erro']}"
+        print(f"{r['consulta']:<40} {r['tempo_s'] * 1000:>10.1f} ms  {situacao}")
+    print(f"Tempo total: {tempo_total * 1000:.1f} ms (soma das consultas: {relatorio['soma_tempos_s'] * 1000:.1f} ms)")
+    print(f"Relatório gravado em {arquivo_saida}")
+    return relatorio
+
+
 def main():
-    cli = SistemaVendasCLI()
+    parser = argparse.ArgumentParser(description="Sistema de Vendas - CLI")
+    parser.add_argument("--streaming", action="store_true",
+                        help="usa cursor server-side e exibe o resultado página por página")
+    parser.add_argument("--itersize", type=int, default=ITERSIZE_PADRAO,
+                        help="linhas buscadas por vez no modo streaming")
+    parser.add_argument("--sem-cache", action="store_true",
+                        help="desliga o cache de resultados das consultas")
+    parser.add_argument("--snapshot", action="store_true",
+                        help=f"responde as consultas {', '.join(map(str, RELATORIOS_SNAPSHOT))} "
+                             "numa cópia em memória (NumPy) das tabelas de vendas")
+    parser.add_argument("--perfil", action="store_true",
+                        help="roda todas as consultas sob EXPLAIN ANALYZE e compara com a baseline")
+    parser.add_argument("--salvar-baseline", action="store_true",
+                        help="com --perfil, grava os planos coletados como nova baseline")
+    parser.add_argument("--baseline", default=ARQUIVO_BASELINE_PADRAO,
+                        help="arquivo JSON com os planos de referência")
+    parser.add_argument("--lote", action="store_true",
+                        help="executa todas as consultas em paralelo, sem menu, e grava o resultado")
+    parser.add_argument("--saida", default="relatorio_lote.json",
+                        help="arquivo JSON gerado pelo modo lote")
+    parser.add_argument("--conexoes", type=int, default=CONEXOES_LOTE_PADRAO,
+                        help="tamanho do pool de conexões do modo lote")
+    parser.add_argument("--assincrono", action="store_true",
+                        help="no modo lote, usa asyncio com psycopg 3 em vez de threads com psycopg2")
+    parser.add_argument("--timeout", type=float,
+                        help="no modo lote assíncrono, statement_timeout de cada consulta em segundos "
+                             "(padrão: 30; 0 desliga)")
+    parser.add_argument("--consulta", type=int, choices=sorted(CONSULTAS),
+                        help="executa uma única consulta do catálogo, sem menu")
+    parser.add_argument("--monitorar-estoque", action="store_true",
+                        help="fica escutando e exibindo os alertas de estoque baixo até o Ctrl-C")
+    parser.add_argument("--estatisticas", nargs="?", const="total", choices=sorted(ORDENACOES),
+                        help="mostra o painel do pg_stat_statements ordenado por total (padrão), media, "
+                             "chamadas ou hit")
+    parser.add_argument("--todas-queries", action="store_true",
+                        help="com --estatisticas, inclui as queries que não são do catálogo")
+    parser.add_argument("--resetar-estatisticas", action="store_true",
+                        help="zera o pg_stat_statements (por exemplo antes de uma rodada do benchmark)")
+    parser.add_argument("--param", action="append", default=[], metavar="NOME=VALOR",
+                        help="parâmetro da consulta escolhida em --consulta (pode repetir)")
+    parser.add_argument("--exportar", metavar="ARQUIVO",
+                        help="com --consulta, grava o resultado no arquivo em vez de exibir")
+    parser.add_argument("--formato", choices=FORMATOS,
+                        help="formato da exportação (padrão: pela extensão do arquivo)")
+    args = parser.parse_args()
+
+    if args.lote:
+        try:
+            executar_lote(args.saida, args.conexoes, args.assincrono, args.timeout)
+        except (psycopg2.Error, ImportError) as e:
+            print(f"Erro ao executar o lote: {e}")
+            sys.exit(1)
+        except KeyboardInterrupt:
+            print("Lote interrompido; as consultas em andamento foram canceladas no servidor.")
+            sys.exit(130)
+        return
+
+    cli = SistemaVendasCLI(modo_streaming=args.streaming, itersize=args.itersize, usar_cache=not args.sem_cache,
+                           arquivo_baseline=args.baseline, modo_snapshot=args.snapshot)
     if cli.conectar_banco():
         try:
-            cli.menu_exercicios()
+            if args.perfil:
+                try:
+                    cli.perfilar_todas(salvar_baseline=args.salvar_baseline)
+                except psycopg2.Error as e:
+                    print(f"Erro ao perfilar as consultas: {e}")
+                    sys.exit(1)
+            elif args.monitorar_estoque:
+                cli.monitorar_estoque()
+            elif args.estatisticas or args.resetar_estatisticas:
+                try:
+                    if args.resetar_estatisticas:
+                        cli.resetar_estatisticas()
+                    if args.estatisticas:
+                        cli.exibir_estatisticas(args.estatisticas, apenas_catalogo=not args.todas_queries)
+                except (RuntimeError, psycopg2.Error) as e:
+                    print(f"Erro no pg_stat_statements: {e}")
+                    sys.exit(1)
+            elif args.consulta:
+                try:
+                    parametros = dict(p.split("=", 1) for p in args.param)
+                    if args.exportar:
+                        cli.exportar_registrada(args.consulta, args.exportar, args.formato, **parametros)
+                    else:
+                        cli.executar_registrada(args.consulta, **parametros)
+                except (ValueError, RuntimeError, OSError, psycopg2.Error) as e:
+                    print(f"Erro ao executar a consulta: {e}")
+                    sys.exit(1)
+            else:
+                cli.menu_exercicios()
         finally:
             cli.desconectar_banco()
     else:
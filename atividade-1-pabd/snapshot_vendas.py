@@ -0,0 +1,233 @@
+"""Cópia em memória (NumPy) de pedido, itens_pedido e produto para análise local.
+
+As tabelas de fatos são lidas uma vez por COPY ... (FORMAT binary). Todas as
+colunas pedidas ao servidor têm tamanho fixo e nenhuma é nula (o status vira
+o código do enum, valores em centavos, datas em microssegundos desde 1970),
+então cada linha do COPY tem o mesmo número de bytes e o buffer inteiro é
+lido de uma vez com np.frombuffer e um dtype estruturado, sem laço em Python.
+
+Os relatórios 3, 10, 12, 13 e 15 são respondidos com bincount e indexação
+por id sobre esses arrays. O snapshot não acompanha o banco: a CLI o marca
+como desatualizado quando chega um NOTIFY das tabelas e ele é recarregado
+sob demanda.
+
+Precisa do numpy (pip install numpy).
+"""
+import io
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# assinatura, flags e tamanho da extensão do cabeçalho do COPY binário
+_CABECALHO_COPY = 19
+# cada linha começa com a quantidade de campos (int16); o arquivo termina com -1 (int16)
+_FIM_COPY = 2
+
+# tabela -> (colunas: nome, tipo numpy big-endian, expressão SQL)
+_COLUNAS: dict[str, list[tuple[str, str, str]]] = {
+    "pedido": [
+        ("id_pedido", ">i4", "id_pedido"),
+        ("id_usuario", ">i4", "id_usuario"),
+        ("data_pedido", ">i8", "(EXTRACT(EPOCH FROM data_pedido) * 1000000)::int8"),
+        # posição no enum_range, começando em 0; 0 também para status nulo
+        ("status", ">i2",
+         "(COALESCE(array_position(enum_range(NULL::status_pedido_enum), status_pedido), 1) - 1)::int2"),
+        ("valor_total", ">i8", "(COALESCE(valor_total, 0) * 100)::int8"),
+    ],
+    "itens_pedido": [
+        ("id_pedido", ">i4", "id_pedido"),
+        ("data_pedido", ">i8", "(EXTRACT(EPOCH FROM data_pedido) * 1000000)::int8"),
+        ("id_produto", ">i4", "id_produto"),
+        ("quantidade", ">i4", "quantidade"),
+        ("subtotal", ">i8", "(subtotal * 100)::int8"),
+    ],
+}
+
+
+def _centavos(valores) -> list[Decimal]:
+    """Array em centavos -> Decimal com duas casas, como os DECIMAL(…,2) do banco.
+
+    Arredonda meio centavo para longe do zero, igual ao ROUND do PostgreSQL em
+    numeric (np.rint arredondaria para o par).
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    arredondados = np.copysign(np.floor(np.abs(valores) + 0.5), valores)
+    return [Decimal(centavos).scaleb(-2) for centavos in arredondados.astype(np.int64).tolist()]
+
+
+def ler_copy_binario(cursor, tabela: str) -> dict[str, Any]:
+    """Lê a tabela por COPY binário e devolve um array por coluna, já no byte order da máquina"""
+    colunas = _COLUNAS[tabela]
+    select = ", ".join(expressao for _, _, expressao in colunas)
+    buffer = io.BytesIO()
+    cursor.copy_expert(f"COPY (SELECT {select} FROM {tabela}) TO STDOUT WITH (FORMAT binary)", buffer)
+    dados = buffer.getbuffer()
+
+    campos = [("quantidade_campos", ">i2")]
+    for nome, tipo, _ in colunas:
+        campos += [(f"tamanho_{nome}", ">i4"), (nome, tipo)]
+    dtype = np.dtype(campos)
+    linhas = (len(dados) - _CABECALHO_COPY - _FIM_COPY) // dtype.itemsize
+    registros = np.frombuffer(dados, dtype=dtype, count=linhas, offset=_CABECALHO_COPY)
+    for nome, tipo, _ in colunas:
+        # um campo nulo (-1) ou de outro tamanho desalinharia todas as linhas seguintes
+        if linhas and not (registros[f"tamanho_{nome}"] == np.dtype(tipo).itemsize).all():
+            raise ValueError(f"{tabela}.{nome} veio com tamanho variável ou nulo no COPY binário")
+    return {nome: registros[nome].astype(tipo[1:]) for nome, tipo, _ in colunas}
+
+
+class SnapshotVendas:
+    # tabelas cujas alterações deixam o snapshot desatualizado
+    TABELAS = frozenset({"pedido", "itens_pedido", "produto", "usuario"})
+    COLUNAS_MENSAL = ["periodo", "total_pedidos", "produtos_diferentes_vendidos", "faturamento_total"]
+
+    def __init__(self):
+        if np is None:
+            raise RuntimeError("O modo snapshot precisa do numpy (pip install numpy)")
+        self.pedido: dict[str, Any] = {}
+        self.itens: dict[str, Any] = {}
+        self.status: list[str] = []
+        self.categorias: list[str] = []
+        # id do produto -> posição nos arrays abaixo
+        self.nomes_produto: Any = None
+        self.categoria_produto: Any = None
+        self.nomes_usuario: dict[int, str] = {}
+        self.carregado_em: Optional[datetime] = None
+        self.tempo_carga_s = 0.0
+        self.desatualizado = False
+
+    @property
+    def carregado(self) -> bool:
+        return self.carregado_em is not None
+
+    def carregar(self, conexao) -> None:
+        """Lê tudo numa transação REPEATABLE READ para pedidos e itens saírem do mesmo instante"""
+        inicio = time.perf_counter()
+        autocommit = conexao.autocommit
+        conexao.autocommit = False
+        try:
+            with conexao.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY;")
+                pedido = ler_copy_binario(cursor, "pedido")
+                itens = ler_copy_binario(cursor, "itens_pedido")
+                cursor.execute("SELECT enum_range(NULL::status_pedido_enum)::text[];")
+                status = cursor.fetchone()[0]
+                cursor.execute("SELECT id_produto, nome, categoria FROM produto;")
+                produtos = cursor.fetchall()
+                cursor.execute("SELECT id_usuario, nome FROM usuario;")
+                usuarios = dict(cursor.fetchall())
+        finally:
+            conexao.rollback()
+            conexao.autocommit = autocommit
+
+        # produtos indexados pelo próprio id: o "join" com os itens vira indexação de array
+        tamanho = max((id_produto for id_produto, _, _ in produtos), default=0) + 1
+        self.categorias = sorted({categoria or "" for _, _, categoria in produtos})
+        codigos = {categoria: i for i, categoria in enumerate(self.categorias)}
+        self.nomes_produto = np.empty(tamanho, dtype=object)
+        self.categoria_produto = np.full(tamanho, -1, dtype=np.int32)
+        for id_produto, nome, categoria in produtos:
+            self.nomes_produto[id_produto] = nome
+            self.categoria_produto[id_produto] = codigos[categoria or ""]
+
+        self._colunas_derivadas(pedido, itens)
+        self.pedido, self.itens, self.status, self.nomes_usuario = pedido, itens, status, usuarios
+        self.carregado_em = datetime.now()
+        self.tempo_carga_s = time.perf_counter() - inicio
+        self.desatualizado = False
+
+    @staticmethod
+    def _colunas_derivadas(pedido: dict[str, Any], itens: dict[str, Any]) -> None:
+        """Colunas calculadas uma vez na carga para os relatórios não repetirem o trabalho"""
+        # status do pedido de cada item (id_pedido é único mesmo com a tabela particionada)
+        ordem = np.argsort(pedido["id_pedido"], kind="stable")
+        ids = pedido["id_pedido"][ordem]
+        posicoes = np.minimum(np.searchsorted(ids, itens["id_pedido"]), max(len(ids) - 1, 0))
+        itens["status"] = pedido["status"][ordem][posicoes] if len(ids) else pedido["status"][:0]
+        # mês do item contado em meses desde 1970-01
+        itens["mes"] = itens["data_pedido"].view("datetime64[us]").astype("datetime64[M]").astype(np.int64)
+
+    # ========================================
+    # RELATÓRIOS
+    # ========================================
+
+    def pedidos_por_status(self) -> tuple[list[str], list[tuple]]:
+        contagem = np.bincount(self.pedido["status"], minlength=len(self.status))
+        linhas = [(self.status[i], int(n)) for i, n in enumerate(contagem) if n]
+        return ["status_pedido", "quantidade_pedidos"], linhas
+
+    def ranking_produtos(self) -> tuple[list[str], list[tuple]]:
+        vendido = np.bincount(self.itens["id_produto"], weights=self.itens["quantidade"],
+                              minlength=len(self.nomes_produto))
+        # o SQL agrupa por nome e categoria, então produtos homônimos da mesma categoria se somam
+        ids = np.flatnonzero(vendido > 0)
+        totais: dict[tuple[str, str], int] = {}
+        for nome, categoria, total in zip(self.nomes_produto[ids].tolist(), self.categoria_produto[ids].tolist(),
+                                          vendido[ids].astype(np.int64).tolist()):
+            chave = (nome, self.categorias[categoria])
+            totais[chave] = totais.get(chave, 0) + total
+        linhas = sorted(((nome, categoria, total) for (nome, categoria), total in totais.items()),
+                        key=lambda linha: linha[2], reverse=True)
+        return ["nome", "categoria", "total_vendido"], linhas
+
+    def estatisticas_cliente(self) -> tuple[list[str], list[tuple]]:
+        validos = self.pedido["status"] != self.status.index("cancelado")
+        usuarios = self.pedido["id_usuario"][validos]
+        quantidade = np.bincount(usuarios)
+        gasto = np.bincount(usuarios, weights=self.pedido["valor_total"][validos])
+        ids = np.flatnonzero(quantidade)
+        ids = ids[np.argsort(-gasto[ids], kind="stable")]
+        linhas = list(zip(
+            [self.nomes_usuario.get(i) for i in ids.tolist()], quantidade[ids].tolist(),
+            _centavos(gasto[ids] / quantidade[ids]), _centavos(gasto[ids]),
+        ))
+        return ["nome", "quantidade_pedidos", "valor_medio_por_pedido", "valor_total_gasto"], linhas
+
+    def relatorio_mensal(self) -> tuple[list[str], list[tuple]]:
+        meses = self.itens["mes"]
+        if not len(meses):
+            return self.COLUNAS_MENSAL, []
+        # meses viram posições 0..n a partir do primeiro, e tudo se resolve com bincount
+        primeiro = meses.min()
+        indice = meses - primeiro
+        faturamento = np.bincount(indice, weights=self.itens["subtotal"])
+        # os itens têm a data do pedido, então cada pedido cai num único mês
+        mes_do_pedido = np.full(self.itens["id_pedido"].max() + 1, -1, dtype=np.int64)
+        mes_do_pedido[self.itens["id_pedido"]] = indice
+        pedidos = np.bincount(mes_do_pedido[mes_do_pedido >= 0], minlength=len(faturamento))
+        # produto vendido no mês: matriz meses x produtos marcada pelos itens
+        vendidos = np.zeros((len(faturamento), len(self.nomes_produto)), dtype=bool)
+        vendidos[indice, self.itens["id_produto"]] = True
+        produtos = vendidos.sum(axis=1)
+        meses_com_venda = np.flatnonzero(pedidos)
+        linhas = list(zip(
+            (primeiro + meses_com_venda).astype("datetime64[M]").astype(str).tolist(),
+            pedidos[meses_com_venda].tolist(), produtos[meses_com_venda].tolist(),
+            _centavos(faturamento[meses_com_venda]),
+        ))
+        return self.COLUNAS_MENSAL, linhas
+
+    def ticket_medio_categoria(self) -> tuple[list[str], list[tuple]]:
+        validos = self.itens["status"] != self.status.index("cancelado")
+        categorias = self.categoria_produto[self.itens["id_produto"][validos]]
+        quantidade = np.bincount(categorias, minlength=len(self.categorias))
+        soma = np.bincount(categorias, weights=self.itens["subtotal"][validos], minlength=len(self.categorias))
+        vendidas = np.flatnonzero(quantidade)
+        linhas = list(zip([self.categorias[i] for i in vendidas.tolist()], _centavos(soma[vendidas] / quantidade[vendidas])))
+        return ["categoria", "ticket_medio"], linhas
+
+
+# número da consulta do catálogo -> método do snapshot que a responde
+RELATORIOS: dict[int, Callable[[SnapshotVendas], tuple[list[str], list[tuple]]]] = {
+    3: SnapshotVendas.pedidos_por_status,
+    10: SnapshotVendas.ranking_produtos,
+    12: SnapshotVendas.estatisticas_cliente,
+    13: SnapshotVendas.relatorio_mensal,
+    15: SnapshotVendas.ticket_medio_categoria,
+}
@@ -0,0 +1,88 @@
+"""Confere pelo EXPLAIN que cada consulta do catálogo usa o índice previsto.
+
+Os índices esperados ficam no campo `indices` de cada Consulta (consultas.py)
+e são criados na seção ÍNDICES do setup.sql. Em tabelas pequenas o planejador
+prefere Seq Scan mesmo com o índice disponível (e nos anti-joins, quando quase
+todos os clientes têm pedidos, um hash join sobre a tabela inteira pode sair
+mais barato que uma sondagem por cliente); rode depois do gerador_dados.py ou
+use --sem-seqscan para só checar se o índice atende o predicado.
+
+Uso:
+    python verificar_indices.py
+    python verificar_indices.py --sem-seqscan
+"""
+import argparse
+import sys
+
+import psycopg2
+
+from config import DB_CONFIG
+from consultas import CONSULTAS, Consulta
+from perfil_consultas import indices_usados
+
+EXPLAIN_PLANO = "EXPLAIN (FORMAT JSON) "
+
+
+def _indices_raiz(cursor, nomes: set[str]) -> set[str]:
+    """Em tabelas particionadas o plano mostra o índice de cada partição;
+    pg_partition_root devolve o índice declarado no setup.sql"""
+    if not nomes:
+        return set()
+    cursor.execute(
+        "SELECT COALESCE(pg_partition_root(c.oid), c.oid)::regclass::text FROM pg_class c "
+        "WHERE c.relname = ANY(%s) AND c.relkind IN ('i', 'I');",
+        (sorted(nomes),),
+    )
+    return {raiz for (raiz,) in cursor.fetchall()}
+
+
+def verificar(conexao, consulta: Consulta) -> tuple[set[str], set[str]]:
+    """Devolve (índices usados, índices esperados que não apareceram no plano)"""
+    with conexao.cursor() as cursor:
+        cursor.execute(EXPLAIN_PLANO + consulta.sql, consulta.valores())
+        plano = cursor.fetchone()[0][0]["Plan"]
+        usados = _indices_raiz(cursor, indices_usados(plano))
+    return usados, set(consulta.indices) - usados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica se as consultas usam os índices previstos")
+    parser.add_argument("--sem-seqscan", action="store_true",
+                        help="desliga enable_seqscan para a checagem não depender do volume de dados")
+    args = parser.parse_args()
+
+    try:
+        conexao = psycopg2.connect(**DB_CONFIG)
+    except psycopg2.Error as e:
+        print(f"Erro ao conectar ao PostgreSQL: {e}")
+        sys.exit(1)
+
+    conexao.autocommit = True
+    falhas = 0
+    try:
+        if args.sem_seqscan:
+            with conexao.cursor() as cursor:
+                cursor.execute("SET enable_seqscan = off;")
+        for consulta in CONSULTAS.values():
+            if not consulta.indices:
+                continue
+            usados, faltando = verificar(conexao, consulta)
+            situacao = "OK" if not faltando else "FALHOU"
+            print(f"{situacao:<7} {consulta.nome:<40} esperado: {', '.join(consulta.indices)}")
+            if faltando:
+                falhas += 1
+                print(f"        usados: {', '.join(sorted(usados)) or 'nenhum índice'}")
+    except psycopg2.Error as e:
+        print(f"Erro ao executar o EXPLAIN: {e}")
+        sys.exit(1)
+    finally:
+        conexao.close()
+
+    if falhas:
+        print(f"{falhas} consulta(s) sem o índice previsto")
+        sys.exit(1)
+    print("Todas as consultas usam os índices previstos")
+
+
+if __name__ == "__main__":
+    main()
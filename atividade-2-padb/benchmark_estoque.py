@@ -0,0 +1,230 @@
+"""Compradores concorrentes disputando o estoque de poucos itens.
+
+Cada comprador é uma thread com a sua conexão e faz compras de carrinhos
+sorteados (vários itens, em ordem aleatória) sobre um conjunto pequeno de
+itens com estoque limitado. Dois modos:
+
+- ordenado: criar_pedido() do setup.sql, que trava os itens em ordem de
+  item_id e reserva todos de uma vez.
+- ingenuo: um UPDATE condicional por item, na ordem do carrinho. Também não
+  vende além do estoque, mas carrinhos com os mesmos itens em ordens
+  diferentes fecham ciclos de locks e o PostgreSQL aborta um deles por
+  deadlock (depois de deadlock_timeout); essa compra conta como falha.
+
+No fim confere que nenhum estoque ficou negativo e que o estoque consumido é
+igual à soma dos itens dos pedidos criados. Depois apaga esses pedidos e
+devolve o estoque original, a não ser que --manter seja usado.
+
+Uso:
+    python benchmark_estoque.py --compradores 32 --compras 50
+    python benchmark_estoque.py --modo ambos --compras 10
+
+O modo ingenuo é bem mais lento: cada deadlock segura os envolvidos por
+deadlock_timeout (1 s por padrão), por isso só roda quando pedido.
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+import psycopg2
+from psycopg2 import errors
+
+from config import DB_CONFIG
+
+MODOS = ["ordenado", "ingenuo"]
+
+
+def comprar_ordenado(cursor, cliente: tuple[int, int, int], carrinho: list[tuple[int, int]]) -> Optional[int]:
+    cursor.execute("SELECT criar_pedido(%s, %s, %s, %s, %s);",
+                   (*cliente, [item for item, _ in carrinho], [quantidade for _, quantidade in carrinho]))
+    return cursor.fetchone()[0]
+
+
+def comprar_ingenuo(cursor, cliente: tuple[int, int, int], carrinho: list[tuple[int, int]]) -> Optional[int]:
+    for item_id, quantidade in carrinho:
+        cursor.execute("UPDATE item SET quantidade_estoque = quantidade_estoque - %s "
+                       "WHERE item_id = %s AND quantidade_estoque >= %s;", (quantidade, item_id, quantidade))
+        if cursor.rowcount == 0:
+            # o chamador desfaz os itens já reservados com ROLLBACK
+            return None
+    cursor.execute("INSERT INTO pedido (cliente_id, endereco_id, forma_pagamento_id, data, status) "
+                   "VALUES (%s, %s, %s, CURRENT_DATE, 'Pendente') RETURNING pedido_id;", cliente)
+    pedido_id = cursor.fetchone()[0]
+    cursor.executemany("INSERT INTO item_pedido (pedido_id, item_id, quantidade) VALUES (%s, %s, %s);",
+                       [(pedido_id, item_id, quantidade) for item_id, quantidade in carrinho])
+    return pedido_id
+
+
+COMPRAS = {"ordenado": comprar_ordenado, "ingenuo": comprar_ingenuo}
+
+
+def _comprador(numero: int, modo: str, args, itens: list[int], cliente: tuple[int, int, int],
+               resultados: list[dict], barreira: threading.Barrier) -> None:
+    sorteio = random.Random(args.semente * 1000 + numero)
+    resultado = {"pedidos": [], "sem_estoque": 0, "deadlocks": 0, "latencias_ms": []}
+    conexao = psycopg2.connect(**DB_CONFIG)
+    try:
+        barreira.wait()
+        for _ in range(args.compras):
+            carrinho = [(item_id, sorteio.randint(1, 3))
+                        for item_id in sorteio.sample(itens, min(args.itens_por_pedido, len(itens)))]
+            inicio = time.perf_counter()
+            try:
+                with conexao.cursor() as cursor:
+                    pedido_id = COMPRAS[modo](cursor, cliente, carrinho)
+                if pedido_id is None:
+                    conexao.rollback()
+                    resultado["sem_estoque"] += 1
+                else:
+                    conexao.commit()
+                    resultado["pedidos"].append(pedido_id)
+            except errors.DeadlockDetected:
+                # sem nova tentativa: repetir o mesmo carrinho na mesma ordem tende a cair no mesmo ciclo
+                conexao.rollback()
+                resultado["deadlocks"] += 1
+            resultado["latencias_ms"].append((time.perf_counter() - inicio) * 1000)
+    finally:
+        conexao.close()
+        resultados[numero] = resultado
+
+
+def conferir(cursor, itens: list[int], estoque_inicial: int, pedidos: list[int]) -> dict:
+    cursor.execute("SELECT item_id, quantidade_estoque FROM item WHERE item_id = ANY(%s);", (itens,))
+    estoque = dict(cursor.fetchall())
+    cursor.execute("SELECT item_id, SUM(quantidade) FROM item_pedido WHERE pedido_id = ANY(%s) GROUP BY item_id;",
+                   (pedidos,))
+    vendido = dict(cursor.fetchall())
+    divergentes = [item_id for item_id in itens if estoque_inicial - estoque[item_id] != vendido.get(item_id, 0)]
+    return {
+        "estoque_negativo": [item_id for item_id in itens if estoque[item_id] < 0],
+        "divergentes": divergentes,
+        "unidades_vendidas": sum(vendido.values()),
+        "itens_esgotados": sum(1 for item_id in itens if estoque[item_id] == 0),
+    }
+
+
+def executar_modo(conexao, modo: str, args, itens: list[int], cliente: tuple[int, int, int]) -> dict:
+    with conexao.cursor() as cursor:
+        cursor.execute("UPDATE item SET quantidade_estoque = %s WHERE item_id = ANY(%s);", (args.estoque, itens))
+    conexao.commit()
+
+    resultados: list[Optional[dict]] = [None] * args.compradores
+    barreira = threading.Barrier(args.compradores)
+    threads = [threading.Thread(target=_comprador, args=(n, modo, args, itens, cliente, resultados, barreira))
+               for n in range(args.compradores)]
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    tempo = time.perf_counter() - inicio
+    if any(r is None for r in resultados):
+        raise RuntimeError("Algum comprador não terminou (erro de conexão?)")
+
+    pedidos = [pedido for r in resultados for pedido in r["pedidos"]]
+    latencias = sorted(latencia for r in resultados for latencia in r["latencias_ms"])
+    with conexao.cursor() as cursor:
+        conferencia = conferir(cursor, itens, args.estoque, pedidos)
+        if not args.manter:
+            cursor.execute("DELETE FROM item_pedido WHERE pedido_id = ANY(%s);", (pedidos,))
+            cursor.execute("DELETE FROM pedido WHERE pedido_id = ANY(%s);", (pedidos,))
+    conexao.commit()
+
+    compras = len(latencias)
+    return {
+        "modo": modo,
+        "tempo_s": tempo,
+        "compras": compras,
+        "compras_por_s": compras / tempo,
+        "pedidos_criados": len(pedidos),
+        "sem_estoque": sum(r["sem_estoque"] for r in resultados),
+        "deadlocks": sum(r["deadlocks"] for r in resultados),
+        "latencia_mediana_ms": statistics.median(latencias),
+        "latencia_p99_ms": latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))],
+        "conferencia": conferencia,
+    }
+
+
+def exibir(resultado: dict) -> None:
+    conferencia = resultado["conferencia"]
+    correto = not conferencia["estoque_negativo"] and not conferencia["divergentes"]
+    print(f"{resultado['modo']:<10} {resultado['compras']} compras em {resultado['tempo_s']:.2f} s "
+          f"({resultado['compras_por_s']:.0f}/s), mediana {resultado['latencia_mediana_ms']:.1f} ms, "
+          f"p99 {resultado['latencia_p99_ms']:.1f} ms")
+    print(f"{'':<10} {resultado['pedidos_criados']} pedido(s), {resultado['sem_estoque']} sem estoque, "
+          f"{resultado['deadlocks']} deadlock(s), {conferencia['unidades_vendidas']} unidade(s) vendida(s), "
+          f"{conferencia['itens_esgotados']} item(ns) esgotado(s)")
+    print(f"{'':<10} estoque {'consistente' if correto else 'INCONSISTENTE'}"
+          + ("" if correto else f": negativos {conferencia['estoque_negativo']}, "
+                                f"divergentes {conferencia['divergentes']}"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de reserva de estoque com compradores concorrentes")
+    parser.add_argument("--modo", choices=MODOS + ["ambos"], default="ordenado")
+    parser.add_argument("--compradores", type=int, default=32, help="threads comprando ao mesmo tempo")
+    parser.add_argument("--compras", type=int, default=50, help="compras de cada comprador")
+    parser.add_argument("--itens", type=int, default=10, help="quantidade de itens disputados")
+    parser.add_argument("--itens-por-pedido", type=int, default=3)
+    parser.add_argument("--estoque", type=int, default=500, help="estoque inicial de cada item disputado")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--manter", action="store_true", help="não apaga os pedidos criados nem restaura o estoque")
+    parser.add_argument("--saida", default="benchmark_estoque.json", help="arquivo JSON do relatório")
+    args = parser.parse_args()
+
+    try:
+        conexao = psycopg2.connect(**DB_CONFIG)
+    except psycopg2.Error as e:
+        print(f"Erro ao conectar ao PostgreSQL: {e}")
+        sys.exit(1)
+    try:
+        with conexao.cursor() as cursor:
+            cursor.execute("SELECT item_id, quantidade_estoque FROM item ORDER BY item_id LIMIT %s;", (args.itens,))
+            estoque_original = cursor.fetchall()
+            cursor.execute("SELECT (SELECT MIN(cliente_id) FROM cliente), (SELECT MIN(endereco_id) FROM endereco), "
+                           "(SELECT MIN(forma_pagamento_id) FROM forma_pagamento);")
+            cliente = cursor.fetchone()
+        itens = [item_id for item_id, _ in estoque_original]
+        if not itens or None in cliente:
+            print("O banco precisa de itens, clientes, endereços e formas de pagamento (rode o setup.sql)")
+            sys.exit(1)
+
+        resultados = []
+        try:
+            for modo in (MODOS if args.modo == "ambos" else [args.modo]):
+                resultados.append(executar_modo(conexao, modo, args, itens, cliente))
+                exibir(resultados[-1])
+        finally:
+            if not args.manter:
+                conexao.rollback()
+                with conexao.cursor() as cursor:
+                    cursor.executemany("UPDATE item SET quantidade_estoque = %s WHERE item_id = %s;",
+                                       [(estoque, item_id) for item_id, estoque in estoque_original])
+                conexao.commit()
+    except (psycopg2.Error, RuntimeError) as e:
+        print(f"Erro durante o benchmark: {e}")
+        sys.exit(1)
+    finally:
+        conexao.close()
+
+    relatorio = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "compradores": args.compradores,
+        "compras_por_comprador": args.compras,
+        "itens": itens,
+        "estoque_inicial": args.estoque,
+        "resultados": resultados,
+    }
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    print(f"Relatório gravado em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
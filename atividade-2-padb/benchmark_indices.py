@@ -0,0 +1,133 @@
+"""Mede as consultas de consultas.py com e sem os índices do setup.sql.
+
+Primeiro cada consulta roda com os índices (uma execução de aquecimento e
+algumas medidas). Depois, numa transação, os índices idx_* são removidos, as
+mesmas consultas são medidas de novo e a transação é desfeita com ROLLBACK,
+então os índices voltam sem precisar ser recriados. O DROP INDEX bloqueia as
+tabelas até o ROLLBACK: rode num banco de teste.
+
+Uso:
+    python benchmark_indices.py --pedidos 1000000
+    python benchmark_indices.py --saida benchmark_indices.json
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import psycopg2
+
+from config import DB_CONFIG
+from consultas import CONSULTAS, Consulta
+from gerador_dados import popular
+
+REPETICOES_PADRAO = 5
+
+
+def _indices_do_setup(cursor) -> list[str]:
+    cursor.execute("SELECT indexname FROM pg_indexes WHERE schemaname = 'public' AND indexname LIKE 'idx\\_%';")
+    return [nome for (nome,) in cursor.fetchall()]
+
+
+def _indices_no_plano(cursor, consulta: Consulta, valores: dict) -> list[str]:
+    cursor.execute("EXPLAIN (FORMAT JSON) " + consulta.sql, valores)
+    nos = [cursor.fetchone()[0][0]["Plan"]]
+    usados = []
+    while nos:
+        no = nos.pop()
+        if "Index Name" in no and no["Index Name"] not in usados:
+            usados.append(no["Index Name"])
+        nos.extend(no.get("Plans", []))
+    return usados
+
+
+def medir(cursor, repeticoes: int) -> dict[str, dict]:
+    resultados = {}
+    for consulta in CONSULTAS.values():
+        valores = consulta.valores()
+        cursor.execute(consulta.sql, valores)
+        linhas = cursor.rowcount
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            cursor.execute(consulta.sql, valores)
+            cursor.fetchall()
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        resultados[consulta.nome] = {
+            "linhas": linhas,
+            "mediana_ms": statistics.median(tempos),
+            "min_ms": min(tempos),
+            "indices_no_plano": _indices_no_plano(cursor, consulta, valores),
+        }
+        print(f"  {consulta.nome:<32} {resultados[consulta.nome]['mediana_ms']:>10.2f} ms  {linhas} linha(s)  "
+              f"[{', '.join(resultados[consulta.nome]['indices_no_plano']) or 'sem índice'}]")
+    return resultados
+
+
+def executar_benchmark(conexao, repeticoes: int) -> dict:
+    conexao.autocommit = False
+    try:
+        with conexao.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM pedido;")
+            pedidos = cursor.fetchone()[0]
+            print(f"Com índices ({pedidos} pedidos)")
+            com_indices = medir(cursor, repeticoes)
+            indices = _indices_do_setup(cursor)
+            for nome in indices:
+                cursor.execute(f"DROP INDEX {nome};")
+            print(f"Sem índices ({', '.join(indices)})")
+            sem_indices = medir(cursor, repeticoes)
+    finally:
+        # desfaz os DROP INDEX
+        conexao.rollback()
+    return {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "pedidos": pedidos,
+        "repeticoes": repeticoes,
+        "indices_removidos": indices,
+        "com_indices": com_indices,
+        "sem_indices": sem_indices,
+    }
+
+
+def exibir_comparacao(relatorio: dict) -> None:
+    print(f"{'consulta':<32} {'sem índices':>14} {'com índices':>14} {'ganho':>10}")
+    for nome, com in relatorio["com_indices"].items():
+        sem = relatorio["sem_indices"][nome]
+        ganho = sem["mediana_ms"] / com["mediana_ms"] if com["mediana_ms"] > 0 else float("inf")
+        print(f"{nome:<32} {sem['mediana_ms']:>11.2f} ms {com['mediana_ms']:>11.2f} ms {ganho:>9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das consultas do marketplace com e sem índices")
+    parser.add_argument("--pedidos", type=int, help="gera essa quantidade de pedidos antes de medir")
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES_PADRAO,
+                        help="execuções medidas de cada consulta")
+    parser.add_argument("--saida", default="benchmark_indices.json", help="arquivo JSON do relatório")
+    args = parser.parse_args()
+
+    try:
+        conexao = psycopg2.connect(**DB_CONFIG)
+    except psycopg2.Error as e:
+        print(f"Erro ao conectar ao PostgreSQL: {e}")
+        sys.exit(1)
+    try:
+        if args.pedidos:
+            popular(conexao, args.pedidos)
+        relatorio = executar_benchmark(conexao, args.repeticoes)
+    except psycopg2.Error as e:
+        print(f"Erro durante o benchmark: {e}")
+        sys.exit(1)
+    finally:
+        conexao.close()
+
+    exibir_comparacao(relatorio)
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2, default=str)
+    print(f"Relatório gravado em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
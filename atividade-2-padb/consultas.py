@@ -0,0 +1,149 @@
+"""Consultas analíticas do marketplace (setup.sql).
+
+Cada consulta tem o SQL com parâmetros nomeados no formato do psycopg2, os
+valores padrão dos parâmetros e os índices do setup.sql que o plano deve
+usar. O benchmark_indices.py roda todas com e sem esses índices.
+"""
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Callable
+
+
+@dataclass(frozen=True)
+class Consulta:
+    nome: str
+    descricao: str
+    sql: str
+    # um padrão pode ser uma função sem argumentos, chamada a cada valores()
+    padroes: dict[str, Any] = field(default_factory=dict)
+    indices: tuple[str, ...] = ()
+
+    def valores(self, **parametros: Any) -> dict[str, Any]:
+        desconhecidos = set(parametros) - set(self.padroes)
+        if desconhecidos:
+            raise ValueError(f"Parâmetro(s) desconhecido(s) para {self.nome}: {', '.join(sorted(desconhecidos))}")
+        padroes = {nome: padrao() if callable(padrao) else padrao for nome, padrao in self.padroes.items()}
+        return {**padroes, **parametros}
+
+
+def _ultimos_dias(dias: int) -> dict[str, Callable[[], date]]:
+    """Janela que termina hoje, calculada quando a consulta roda e não no import"""
+    return {
+        "data_inicio": lambda: date.today() - timedelta(days=dias),
+        "data_fim": lambda: date.today() + timedelta(days=1),
+    }
+
+
+CONSULTAS: dict[str, Consulta] = {c.nome: c for c in (
+    Consulta(
+        "faturamento_por_vendedor",
+        "Faturamento e pedidos de cada vendedor no período (pedidos cancelados não contam)",
+        """
+        SELECT v.vendedor_id, v.nome,
+            COUNT(DISTINCT p.pedido_id) AS pedidos,
+            SUM(ip.quantidade * ip.preco_unitario) AS faturamento
+        FROM pedido p
+        JOIN item_pedido ip ON ip.pedido_id = p.pedido_id
+        JOIN item i ON i.item_id = ip.item_id
+        JOIN vendedor v ON v.vendedor_id = i.vendedor_id
+        WHERE p.data >= %(data_inicio)s AND p.data < %(data_fim)s
+          AND p.status <> 'Cancelado'
+        GROUP BY v.vendedor_id, v.nome
+        ORDER BY faturamento DESC;
+        """,
+        _ultimos_dias(7),
+        ("idx_pedido_data", "idx_item_pedido_pedido"),
+    ),
+    Consulta(
+        "top_categorias",
+        "Categorias mais vendidas no período, por quantidade",
+        """
+        SELECT i.categoria,
+            SUM(ip.quantidade) AS quantidade_vendida,
+            SUM(ip.quantidade * ip.preco_unitario) AS faturamento
+        FROM pedido p
+        JOIN item_pedido ip ON ip.pedido_id = p.pedido_id
+        JOIN item i ON i.item_id = ip.item_id
+        WHERE p.data >= %(data_inicio)s AND p.data < %(data_fim)s
+          AND p.status <> 'Cancelado'
+        GROUP BY i.categoria
+        ORDER BY quantidade_vendida DESC
+        LIMIT %(limite)s;
+        """,
+        {**_ultimos_dias(7), "limite": 10},
+        ("idx_pedido_data", "idx_item_pedido_pedido"),
+    ),
+    Consulta(
+        "faturamento_diario",
+        "Pedidos e faturamento de cada dia do período, direto de pedido.valor_total",
+        """
+        SELECT p.data,
+            COUNT(*) AS pedidos,
+            SUM(p.valor_total) AS faturamento
+        FROM pedido p
+        WHERE p.data >= %(data_inicio)s AND p.data < %(data_fim)s
+          AND p.status <> 'Cancelado'
+        GROUP BY p.data
+        ORDER BY p.data;
+        """,
+        _ultimos_dias(30),
+        ("idx_pedido_data",),
+    ),
+    Consulta(
+        "pedidos_por_local",
+        "Pedidos e valor total por cidade de um estado",
+        """
+        SELECT e.estado, e.cidade,
+            COUNT(*) AS pedidos,
+            SUM(p.valor_total) AS valor_total
+        FROM endereco e
+        JOIN pedido p ON p.endereco_id = e.endereco_id
+        WHERE e.estado = %(estado)s
+        GROUP BY e.estado, e.cidade
+        ORDER BY pedidos DESC;
+        """,
+        {"estado": "RN"},
+        ("idx_endereco_estado_cidade", "idx_pedido_endereco"),
+    ),
+    Consulta(
+        "pedidos_do_cliente",
+        "Pedidos de um cliente com a quantidade de itens de cada um",
+        """
+        SELECT p.pedido_id, p.data, p.status, p.valor_total,
+            (SELECT SUM(ip.quantidade) FROM item_pedido ip WHERE ip.pedido_id = p.pedido_id) AS itens
+        FROM pedido p
+        WHERE p.cliente_id = %(cliente_id)s
+        ORDER BY p.data DESC;
+        """,
+        {"cliente_id": 1},
+        ("idx_pedido_cliente", "idx_item_pedido_pedido"),
+    ),
+    Consulta(
+        "busca_catalogo",
+        "Itens mais relevantes para um texto digitado (mesma consulta de buscar_itens)",
+        """
+        SELECT i.item_id, i.nome, i.categoria, i.preco, ts_rank(i.busca, q) AS relevancia
+        FROM item i, consulta_busca(%(texto)s) q
+        WHERE i.busca @@ q
+        ORDER BY relevancia DESC, i.item_id
+        LIMIT %(limite)s OFFSET (GREATEST(%(pagina)s, 1) - 1) * %(limite)s;
+        """,
+        {"texto": "relogio aurora", "limite": 20, "pagina": 1},
+        ("idx_item_busca",),
+    ),
+    Consulta(
+        "vendas_dos_itens_do_vendedor",
+        "Quantidade vendida de cada item de um vendedor",
+        """
+        SELECT i.item_id, i.nome, i.categoria,
+            COALESCE(SUM(ip.quantidade), 0) AS quantidade_vendida
+        FROM item i
+        LEFT JOIN item_pedido ip ON ip.item_id = i.item_id
+        WHERE i.vendedor_id = %(vendedor_id)s
+        GROUP BY i.item_id, i.nome, i.categoria
+        ORDER BY quantidade_vendida DESC;
+        """,
+        {"vendedor_id": 1},
+        ("idx_item_vendedor", "idx_item_pedido_item"),
+    ),
+)}
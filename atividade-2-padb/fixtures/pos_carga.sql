@@ -0,0 +1,2 @@
+-- os triggers ficam desligados durante o COPY, então valor_total é recalculado de uma vez
+SELECT recalcular_valor_total_pedidos();
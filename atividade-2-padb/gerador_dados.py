@@ -0,0 +1,190 @@
+"""Gerador de dados sintéticos para o marketplace (setup.sql).
+
+Os dados são gerados no próprio servidor com generate_series e random()
+(com setseed para sair sempre igual), então 1M de pedidos não passam pela
+rede nem por Python. Os clientes são espalhados pelos estados e os pedidos
+pelos últimos meses.
+
+Uso:
+    python gerador_dados.py --pedidos 1000000
+"""
+import argparse
+import sys
+import time
+from typing import Optional
+
+import psycopg2
+
+from config import DB_CONFIG
+
+ESTADOS = ["SP", "RJ", "MG", "BA", "PR", "RS", "PE", "CE", "PA", "SC", "GO", "RN", "PB", "AM", "ES"]
+CATEGORIAS = ["Livros", "Eletrônicos", "Acessórios", "Casa", "Esporte", "Moda", "Brinquedos", "Beleza"]
+STATUS = ["Concluído", "Concluído", "Concluído", "Pendente", "Cancelado"]
+FORMAS_PAGAMENTO = ["Cartão de Crédito", "Boleto Bancário", "Pix", "Cartão de Débito"]
+# nome do item = produto + marca + número; descrição = três adjetivos
+PRODUTOS = ["Fone de Ouvido", "Notebook", "Smartphone", "Relógio", "Cadeira", "Mochila", "Camiseta", "Tênis",
+            "Livro", "Luminária", "Caixa de Som", "Teclado", "Mouse", "Monitor", "Bicicleta", "Panela",
+            "Garrafa Térmica", "Carregador", "Câmera", "Boneca", "Perfume", "Jaqueta", "Óculos de Sol", "Tapete"]
+MARCAS = ["Aurora", "Boreal", "Cometa", "Delta", "Estrela", "Fênix", "Gávea", "Horizonte", "Ipê", "Jequitibá",
+          "Lótus", "Maré", "Nordeste", "Órion", "Pampa", "Quasar"]
+ADJETIVOS = ["resistente", "leve", "compacto", "confortável", "elegante", "econômico", "silencioso", "portátil",
+             "durável", "ergonômico", "sem fio", "à prova d'água", "recarregável", "clássico", "moderno",
+             "infantil", "profissional", "térmico", "dobrável", "premium"]
+# cidades sorteadas por estado
+CIDADES_POR_ESTADO = 20
+
+# (tabela, comando) na ordem de carga; %(...)s são os tamanhos calculados em popular()
+CARGAS = [
+    ("cliente", """
+        INSERT INTO cliente (cliente_id, nome, cpf, telefone, email)
+        SELECT g, 'Cliente ' || g, lpad(g::text, 11, '0'), '84' || lpad((random() * 1e9)::bigint::text, 9, '0'),
+            'cliente' || g || '@example.com'
+        FROM generate_series(1, %(clientes)s) g;
+    """),
+    ("endereco", """
+        INSERT INTO endereco (endereco_id, cliente_id, rua, cidade, estado, cep)
+        SELECT g, g, 'Rua ' || g, 'Cidade ' || (1 + floor(random() * %(cidades)s))::int,
+            (%(estados)s::text[])[1 + floor(random() * cardinality(%(estados)s::text[]))::int],
+            lpad((random() * 99999)::int::text, 5, '0') || '-000'
+        FROM generate_series(1, %(clientes)s) g;
+    """),
+    ("forma_pagamento", """
+        INSERT INTO forma_pagamento (forma_pagamento_id, tipo)
+        SELECT n, tipo FROM unnest(%(formas)s::text[]) WITH ORDINALITY AS f (tipo, n);
+    """),
+    ("vendedor", """
+        INSERT INTO vendedor (vendedor_id, nome, endereco, telefone)
+        SELECT g, 'Loja ' || g, 'Avenida ' || g, '84' || lpad(g::text, 9, '0')
+        FROM generate_series(1, %(vendedores)s) g;
+    """),
+    ("item", """
+        INSERT INTO item (item_id, vendedor_id, nome, preco, descricao, categoria, quantidade_estoque)
+        SELECT g, 1 + floor(random() * %(vendedores)s)::int,
+            (%(produtos)s::text[])[1 + floor(random() * cardinality(%(produtos)s::text[]))::int] || ' '
+                || (%(marcas)s::text[])[1 + floor(random() * cardinality(%(marcas)s::text[]))::int] || ' ' || g,
+            round((10 + random() * random() * 3000)::numeric, 2),
+            initcap((%(adjetivos)s::text[])[1 + floor(random() * cardinality(%(adjetivos)s::text[]))::int]) || ', '
+                || (%(adjetivos)s::text[])[1 + floor(random() * cardinality(%(adjetivos)s::text[]))::int] || ' e '
+                || (%(adjetivos)s::text[])[1 + floor(random() * cardinality(%(adjetivos)s::text[]))::int],
+            (%(categorias)s::text[])[1 + floor(random() * cardinality(%(categorias)s::text[]))::int],
+            floor(random() * 500)::int
+        FROM generate_series(1, %(itens)s) g;
+    """),
+    ("pedido", """
+        INSERT INTO pedido (pedido_id, cliente_id, endereco_id, forma_pagamento_id, data, valor_total, status)
+        SELECT g, c, c, 1 + floor(random() * cardinality(%(formas)s::text[]))::int,
+            CURRENT_DATE - floor(random() * %(dias)s)::int, 0,
+            (%(status)s::text[])[1 + floor(random() * cardinality(%(status)s::text[]))::int]
+        -- cada cliente tem um endereço com o mesmo id, então o mesmo sorteio serve para os dois
+        FROM (SELECT g, 1 + floor(random() * %(clientes)s)::int AS c FROM generate_series(1, %(pedidos)s) g) s;
+    """),
+    # de 1 a 4 itens por pedido; com os triggers desligados o preco_unitario vem do join com item
+    ("item_pedido", """
+        INSERT INTO item_pedido (pedido_id, item_id, quantidade, preco_unitario)
+        SELECT l.p, l.item_id, l.quantidade, i.preco
+        FROM (SELECT s.p, 1 + floor(random() * %(itens)s)::int AS item_id, 1 + floor(random() * 3)::int AS quantidade
+              FROM (SELECT p, 1 + floor(random() * 4)::int AS n FROM generate_series(1, %(pedidos)s) p) s,
+                  generate_series(1, s.n)) l
+        JOIN item i ON i.item_id = l.item_id;
+    """),
+]
+
+# os ids sorteados sempre existem, então durante a carga as FKs não são checadas linha a linha
+# (DISABLE TRIGGER ALL desliga também os triggers internos das FKs; precisa de superusuário).
+# Os triggers de valor_total também ficam desligados: ele é recalculado uma vez no fim.
+TABELAS_SEM_TRIGGERS = ["pedido", "item_pedido"]
+
+SEQUENCIAS = [("cliente", "cliente_id"), ("endereco", "endereco_id"), ("forma_pagamento", "forma_pagamento_id"),
+              ("vendedor", "vendedor_id"), ("item", "item_id"), ("pedido", "pedido_id"),
+              ("item_pedido", "item_pedido_id")]
+
+
+def popular(conexao, pedidos: int, semente: float = 0.42, dias: int = 730, itens: Optional[int] = None) -> dict:
+    """Apaga os dados atuais e gera a escala pedida numa única transação"""
+    tamanhos = {
+        "pedidos": pedidos,
+        "clientes": max(100, pedidos // 10),
+        "vendedores": max(5, pedidos // 1000),
+        "itens": itens or max(50, min(pedidos // 20, 100_000)),
+        "cidades": CIDADES_POR_ESTADO,
+        "dias": dias,
+        "estados": ESTADOS,
+        "categorias": CATEGORIAS,
+        "produtos": PRODUTOS,
+        "marcas": MARCAS,
+        "adjetivos": ADJETIVOS,
+        "status": STATUS,
+        "formas": FORMAS_PAGAMENTO,
+    }
+    tempos = {}
+    autocommit = conexao.autocommit
+    conexao.autocommit = False
+    try:
+        with conexao.cursor() as cursor:
+            cursor.execute("TRUNCATE item_pedido, pedido, item, vendedor, forma_pagamento, endereco, cliente "
+                           "RESTART IDENTITY CASCADE;")
+            cursor.execute("SELECT setseed(%s);", (semente,))
+            # índices secundários são recriados no fim, de uma vez, em vez de atualizados a cada linha
+            cursor.execute("SELECT indexname, indexdef FROM pg_indexes "
+                           "WHERE schemaname = 'public' AND indexname LIKE 'idx\\_%';")
+            indices = cursor.fetchall()
+            for nome, _ in indices:
+                cursor.execute(f"DROP INDEX {nome};")
+            for tabela in TABELAS_SEM_TRIGGERS:
+                cursor.execute(f"ALTER TABLE {tabela} DISABLE TRIGGER ALL;")
+            for tabela, comando in CARGAS:
+                inicio = time.perf_counter()
+                cursor.execute(comando, tamanhos)
+                tempos[tabela] = time.perf_counter() - inicio
+                print(f"{tabela:<16} {cursor.rowcount:>12} linha(s) em {tempos[tabela]:.1f} s")
+            inicio = time.perf_counter()
+            cursor.execute("SELECT recalcular_valor_total_pedidos();")
+            tempos["valor_total"] = time.perf_counter() - inicio
+            for tabela in TABELAS_SEM_TRIGGERS:
+                cursor.execute(f"ALTER TABLE {tabela} ENABLE TRIGGER ALL;")
+            inicio = time.perf_counter()
+            for _, definicao in indices:
+                cursor.execute(definicao)
+            tempos["indices"] = time.perf_counter() - inicio
+            for tabela, coluna in SEQUENCIAS:
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence('{tabela}', '{coluna}'), "
+                    f"COALESCE((SELECT MAX({coluna}) FROM {tabela}), 0) + 1, false);"
+                )
+        conexao.commit()
+        # VACUUM não roda dentro de transação; atualiza estatísticas e visibility map
+        conexao.autocommit = True
+        inicio = time.perf_counter()
+        with conexao.cursor() as cursor:
+            cursor.execute("VACUUM ANALYZE cliente, endereco, forma_pagamento, vendedor, item, pedido, item_pedido;")
+        tempos["vacuum_analyze"] = time.perf_counter() - inicio
+    except BaseException:
+        if not conexao.autocommit:
+            conexao.rollback()
+        raise
+    finally:
+        conexao.autocommit = autocommit
+    return {"pedidos": pedidos, "clientes": tamanhos["clientes"], "itens": tamanhos["itens"], "tempos_s": tempos}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos para o marketplace")
+    parser.add_argument("--pedidos", type=int, default=1_000_000, help="quantidade de pedidos")
+    parser.add_argument("--semente", type=float, default=0.42, help="semente do random() (entre -1 e 1)")
+    parser.add_argument("--dias", type=int, default=730, help="quantos dias de histórico gerar")
+    parser.add_argument("--itens", type=int, help="quantidade de itens do catálogo (padrão: pedidos / 20, até 100 mil)")
+    args = parser.parse_args()
+
+    try:
+        conexao = psycopg2.connect(**DB_CONFIG)
+    except psycopg2.Error as e:
+        print(f"Erro ao conectar ao PostgreSQL: {e}")
+        sys.exit(1)
+    try:
+        popular(conexao, args.pedidos, args.semente, args.dias, args.itens)
+    finally:
+        conexao.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,21 @@
-DROP TABLE IF EXISTS cliente CASCADE;
-DROP TABLE IF EXISTS endereco CASCADE;
-DROP TABLE IF EXISTS forma_pagamento CASCADE;
-DROP TABLE IF EXISTS item CASCADE;
+DROP TABLE IF EXISTS item_pedido CASCADE;
 DROP TABLE IF EXISTS pedido CASCADE;
+DROP TABLE IF EXISTS item CASCADE;
+DROP TABLE IF EXISTS vendedor CASCADE;
+DROP TABLE IF EXISTS forma_pagamento CASCADE;
+DROP TABLE IF EXISTS endereco CASCADE;
+DROP TABLE IF EXISTS cliente CASCADE;
+
+DROP TYPE IF EXISTS delta_valor_pedido CASCADE;
+
+-- busca textual do catálogo ignora acentos ("relogio" acha "Relógio")
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() é STABLE (depende do dicionário configurado) e não pode ir numa coluna
+-- gerada nem num índice; com o dicionário fixo a função pode ser declarada IMMUTABLE
+CREATE OR REPLACE FUNCTION f_unaccent(texto TEXT) RETURNS TEXT AS $$
+    SELECT public.unaccent('public.unaccent'::regdictionary, texto)
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
 
 CREATE TABLE cliente (
     cliente_id SERIAL PRIMARY KEY,
@@ -40,7 +53,14 @@ CREATE TABLE item (
     preco DECIMAL(10, 2) NOT NULL,
     descricao TEXT,
     categoria VARCHAR(50),
-    quantidade_estoque INT NOT NULL
+    -- a reserva (reservar_estoque) nunca deixa negativo; o CHECK é a última barreira
+    quantidade_estoque INT NOT NULL CHECK (quantidade_estoque >= 0),
+    -- documento da busca textual: nome pesa mais que a categoria, que pesa mais que a descrição
+    busca TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('portuguese', f_unaccent(nome)), 'A') ||
+        setweight(to_tsvector('portuguese', f_unaccent(COALESCE(categoria, ''))), 'B') ||
+        setweight(to_tsvector('portuguese', f_unaccent(COALESCE(descricao, ''))), 'C')
+    ) STORED
 );
 
 CREATE TABLE pedido (
@@ -49,7 +69,8 @@ CREATE TABLE pedido (
     endereco_id INT REFERENCES endereco(endereco_id),
     forma_pagamento_id INT REFERENCES forma_pagamento(forma_pagamento_id),
     data DATE NOT NULL,
-    valor_total DECIMAL(10, 2) NOT NULL,
+    -- soma de quantidade * preco_unitario dos itens, mantida pelos triggers de item_pedido
+    valor_total DECIMAL(10, 2) NOT NULL DEFAULT 0,
     status VARCHAR(50) NOT NULL
 );
 
@@ -57,9 +78,254 @@ CREATE TABLE item_pedido (
     item_pedido_id SERIAL PRIMARY KEY,
     pedido_id INT REFERENCES pedido(pedido_id),
     item_id INT REFERENCES item(item_id),
-    quantidade INT NOT NULL
+    quantidade INT NOT NULL,
+    -- preço do item no momento da compra; se não vier no INSERT, o trigger copia item.preco
+    preco_unitario DECIMAL(10, 2) NOT NULL
 );
 
+-- ÍNDICES
+-- O PostgreSQL só indexa sozinho as chaves primárias e os UNIQUE (cpf); as chaves
+-- estrangeiras abaixo são as colunas dos joins. As consultas de consultas.py
+-- usam cada um deles e o benchmark_indices.py mede a diferença.
+
+-- itens de um pedido e pedidos de um item; o INCLUDE deixa a sondagem por pedido
+-- (faturamento e categorias de um período) como Index Only Scan
+CREATE INDEX idx_item_pedido_pedido ON item_pedido (pedido_id) INCLUDE (item_id, quantidade, preco_unitario);
+CREATE INDEX idx_item_pedido_item ON item_pedido (item_id);
+-- pedidos de um cliente e de um endereço; nos pedidos por cidade/estado o INCLUDE
+-- evita ler o heap de pedido para cada endereço do estado
+CREATE INDEX idx_pedido_cliente ON pedido (cliente_id);
+CREATE INDEX idx_pedido_endereco ON pedido (endereco_id) INCLUDE (valor_total);
+CREATE INDEX idx_endereco_cliente ON endereco (cliente_id);
+-- itens de um vendedor
+CREATE INDEX idx_item_vendedor ON item (vendedor_id);
+
+-- faturamento e categorias de um período
+CREATE INDEX idx_pedido_data ON pedido (data);
+-- pedidos por local: filtra o estado e agrupa por cidade
+CREATE INDEX idx_endereco_estado_cidade ON endereco (estado, cidade);
+-- busca textual do catálogo (buscar_itens)
+CREATE INDEX idx_item_busca ON item USING GIN (busca);
+
+-- VALOR TOTAL DO PEDIDO
+-- item_pedido guarda o preço pago, então mudar item.preco não altera pedidos antigos,
+-- e pedido.valor_total acompanha os itens: relatórios de faturamento por pedido
+-- leem uma coluna em vez de somar os itens de novo.
+
+CREATE OR REPLACE FUNCTION preencher_preco_unitario() RETURNS TRIGGER AS $$
+BEGIN
+    -- na troca de item sem preço novo, vale o preço do item novo
+    IF NEW.preco_unitario IS NULL
+       OR (TG_OP = 'UPDATE' AND NEW.item_id IS DISTINCT FROM OLD.item_id
+           AND NEW.preco_unitario = OLD.preco_unitario) THEN
+        SELECT preco INTO NEW.preco_unitario FROM item WHERE item_id = NEW.item_id;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_preco_unitario
+    BEFORE INSERT OR UPDATE OF item_id, preco_unitario ON item_pedido
+    FOR EACH ROW EXECUTE FUNCTION preencher_preco_unitario();
+
+-- Variação no valor de um pedido: positiva quando o item entra, negativa quando sai
+CREATE TYPE delta_valor_pedido AS (
+    pedido_id INTEGER,
+    valor DECIMAL(12, 2)
+);
+
+-- Uma chamada por comando (trigger de statement com transition tables), então um
+-- INSERT de muitos itens atualiza cada pedido uma vez só. O UPDATE tira a versão
+-- antiga do item e põe a nova, o que cobre mudança de quantidade, de preço e de pedido.
+CREATE OR REPLACE FUNCTION atualizar_valor_total_pedido() RETURNS TRIGGER AS $$
+DECLARE
+    delta delta_valor_pedido[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        delta := ARRAY(
+            SELECT ROW(i.pedido_id, i.quantidade * i.preco_unitario)::delta_valor_pedido
+            FROM itens_novos i);
+    ELSIF TG_OP = 'DELETE' THEN
+        delta := ARRAY(
+            SELECT ROW(i.pedido_id, -i.quantidade * i.preco_unitario)::delta_valor_pedido
+            FROM itens_antigos i);
+    ELSE
+        delta := ARRAY(
+            SELECT ROW(i.pedido_id, -i.quantidade * i.preco_unitario)::delta_valor_pedido
+            FROM itens_antigos i
+            UNION ALL
+            SELECT ROW(i.pedido_id, i.quantidade * i.preco_unitario)::delta_valor_pedido
+            FROM itens_novos i);
+    END IF;
+
+    UPDATE pedido p SET valor_total = p.valor_total + d.valor
+    FROM (
+        SELECT pedido_id, SUM(valor) AS valor
+        FROM unnest(delta)
+        WHERE pedido_id IS NOT NULL
+        GROUP BY pedido_id
+        HAVING SUM(valor) <> 0
+    ) d
+    WHERE p.pedido_id = d.pedido_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_valor_total_insert
+    AFTER INSERT ON item_pedido
+    REFERENCING NEW TABLE AS itens_novos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_valor_total_pedido();
+
+CREATE TRIGGER trg_valor_total_update
+    AFTER UPDATE ON item_pedido
+    REFERENCING OLD TABLE AS itens_antigos NEW TABLE AS itens_novos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_valor_total_pedido();
+
+CREATE TRIGGER trg_valor_total_delete
+    AFTER DELETE ON item_pedido
+    REFERENCING OLD TABLE AS itens_antigos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_valor_total_pedido();
+
+-- Recalcula valor_total de todos os pedidos (usar depois de cargas com os triggers desligados)
+CREATE OR REPLACE FUNCTION recalcular_valor_total_pedidos() RETURNS VOID AS $$
+BEGIN
+    UPDATE pedido p SET valor_total = t.total
+    FROM (
+        SELECT pedido_id, SUM(quantidade * preco_unitario) AS total
+        FROM item_pedido
+        GROUP BY pedido_id
+    ) t
+    WHERE t.pedido_id = p.pedido_id AND p.valor_total <> t.total;
+
+    UPDATE pedido p SET valor_total = 0
+    WHERE p.valor_total <> 0
+      AND NOT EXISTS (SELECT 1 FROM item_pedido ip WHERE ip.pedido_id = p.pedido_id);
+END;
+$$ LANGUAGE plpgsql;
+
+-- BUSCA NO CATÁLOGO
+-- As palavras digitadas são buscadas sem acento e com o stemming do português; a
+-- última vira prefixo (fone sem fio blue -> 'fone' & 'fio' & 'blue':*), então a
+-- busca funciona enquanto o usuário digita. Só a última: no GIN cada prefixo junta
+-- as listas de todos os termos que começam com ele, bem mais caro que um termo exato.
+-- O GIN em item.busca resolve o @@; só os itens encontrados são ordenados.
+
+-- Texto digitado -> tsquery; NULL quando não sobra nenhuma palavra
+CREATE OR REPLACE FUNCTION consulta_busca(p_texto TEXT) RETURNS TSQUERY AS $$
+    SELECT to_tsquery('portuguese', string_agg(
+        quote_literal(termo) || CASE WHEN posicao = ultima AND length(termo) >= 3 THEN ':*' ELSE '' END,
+        ' & ' ORDER BY posicao))
+    FROM (
+        SELECT termo, posicao, MAX(posicao) OVER () AS ultima
+        FROM regexp_split_to_table(lower(f_unaccent(p_texto)), '[^[:alnum:]]+') WITH ORDINALITY AS t (termo, posicao)
+        WHERE termo <> ''
+    ) termos
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- Itens mais relevantes para o texto, p_limite por página (páginas começam em 1)
+CREATE OR REPLACE FUNCTION buscar_itens(p_texto TEXT, p_limite INTEGER DEFAULT 20, p_pagina INTEGER DEFAULT 1)
+RETURNS TABLE (item_id INTEGER, nome VARCHAR, categoria VARCHAR, preco DECIMAL, relevancia REAL) AS $$
+    SELECT i.item_id, i.nome, i.categoria, i.preco, ts_rank(i.busca, q) AS relevancia
+    FROM item i, consulta_busca(p_texto) q
+    WHERE i.busca @@ q
+    ORDER BY relevancia DESC, i.item_id
+    LIMIT p_limite OFFSET (GREATEST(p_pagina, 1) - 1) * p_limite
+$$ LANGUAGE sql STABLE;
+
+-- ESTOQUE
+-- A compra reserva o estoque de todos os itens do carrinho de uma vez ou de
+-- nenhum. As linhas de item são travadas em ordem de item_id: dois carrinhos com
+-- itens em comum esperam um pelo outro na mesma sequência e nunca fecham um
+-- ciclo (deadlock). O UPDATE condicional decrementa só onde há estoque.
+
+-- Retorna false, sem alterar nada, se algum item não tem estoque suficiente
+CREATE OR REPLACE FUNCTION reservar_estoque(p_itens INTEGER[], p_quantidades INTEGER[]) RETURNS BOOLEAN AS $$
+DECLARE
+    distintos INTEGER;
+    atualizados INTEGER;
+BEGIN
+    IF p_itens IS NULL OR cardinality(p_itens) = 0
+       OR cardinality(p_itens) IS DISTINCT FROM cardinality(p_quantidades)
+       OR EXISTS (SELECT 1 FROM unnest(p_quantidades) q WHERE q IS NULL OR q <= 0) THEN
+        RAISE EXCEPTION 'Itens e quantidades inválidos: % / %', p_itens, p_quantidades
+            USING ERRCODE = 'invalid_parameter_value';
+    END IF;
+
+    PERFORM 1 FROM item WHERE item_id = ANY(p_itens) ORDER BY item_id FOR UPDATE;
+
+    -- com as linhas travadas ninguém muda o estoque entre esta checagem e o UPDATE
+    IF EXISTS (
+        SELECT 1
+        FROM unnest(p_itens, p_quantidades) AS c (item_id, quantidade)
+        LEFT JOIN item i ON i.item_id = c.item_id
+        GROUP BY c.item_id, i.quantidade_estoque
+        HAVING i.quantidade_estoque IS NULL OR i.quantidade_estoque < SUM(c.quantidade)
+    ) THEN
+        RETURN FALSE;
+    END IF;
+
+    UPDATE item i SET quantidade_estoque = i.quantidade_estoque - c.quantidade
+    FROM (
+        SELECT item_id, SUM(quantidade) AS quantidade
+        FROM unnest(p_itens, p_quantidades) AS c (item_id, quantidade)
+        GROUP BY item_id
+    ) c
+    WHERE i.item_id = c.item_id AND i.quantidade_estoque >= c.quantidade;
+    GET DIAGNOSTICS atualizados = ROW_COUNT;
+    SELECT COUNT(DISTINCT x) INTO distintos FROM unnest(p_itens) x;
+    IF atualizados <> distintos THEN
+        RAISE EXCEPTION 'Estoque mudou durante a reserva de %', p_itens;
+    END IF;
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Reserva o estoque e grava o pedido com os itens (preço e valor_total vêm dos triggers).
+-- Retorna o pedido_id, ou NULL quando falta estoque.
+CREATE OR REPLACE FUNCTION criar_pedido(p_cliente_id INTEGER, p_endereco_id INTEGER, p_forma_pagamento_id INTEGER,
+                                        p_itens INTEGER[], p_quantidades INTEGER[]) RETURNS INTEGER AS $$
+DECLARE
+    novo_pedido INTEGER;
+BEGIN
+    IF NOT reservar_estoque(p_itens, p_quantidades) THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO pedido (cliente_id, endereco_id, forma_pagamento_id, data, status)
+    VALUES (p_cliente_id, p_endereco_id, p_forma_pagamento_id, CURRENT_DATE, 'Pendente')
+    RETURNING pedido_id INTO novo_pedido;
+
+    INSERT INTO item_pedido (pedido_id, item_id, quantidade)
+    SELECT novo_pedido, item_id, quantidade
+    FROM unnest(p_itens, p_quantidades) AS c (item_id, quantidade);
+    RETURN novo_pedido;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Cancela o pedido e devolve o estoque dos itens; false se já estava cancelado
+CREATE OR REPLACE FUNCTION cancelar_pedido(p_pedido_id INTEGER) RETURNS BOOLEAN AS $$
+BEGIN
+    UPDATE pedido SET status = 'Cancelado' WHERE pedido_id = p_pedido_id AND status <> 'Cancelado';
+    IF NOT FOUND THEN
+        RETURN FALSE;
+    END IF;
+
+    PERFORM 1 FROM item
+    WHERE item_id IN (SELECT item_id FROM item_pedido WHERE pedido_id = p_pedido_id)
+    ORDER BY item_id FOR UPDATE;
+
+    UPDATE item i SET quantidade_estoque = i.quantidade_estoque + c.quantidade
+    FROM (
+        SELECT item_id, SUM(quantidade) AS quantidade
+        FROM item_pedido
+        WHERE pedido_id = p_pedido_id
+        GROUP BY item_id
+    ) c
+    WHERE i.item_id = c.item_id;
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
 INSERT INTO cliente (nome, cpf, telefone, email) VALUES
 ('Ana Silva', '12345678901', '11987654321', 'ana.silva@example.com'),
 ('Carlos Oliveira', '23456789012', '21987654321', 'carlos.oliveira@example.com'),
@@ -171,20 +437,20 @@ INSERT INTO forma_pagamento (tipo) VALUES
 ('Vale-Alimentação'),
 ('Cheque');
 
--- Inserindo pedidos
-INSERT INTO pedido (cliente_id, endereco_id, forma_pagamento_id, data, valor_total, status) VALUES
-(1, 1, 1, '2023-10-01', 259.70, 'Concluído'),
-(2, 2, 2, '2023-10-02', 499.80, 'Concluído'),
-(3, 3, 3, '2023-10-03', 349.70, 'Pendente'),
-(4, 4, 4, '2023-10-04', 699.60, 'Concluído'),
-(5, 5, 5, '2023-10-05', 1199.50, 'Cancelado'),
-(6, 6, 6, '2023-10-06', 899.70, 'Concluído'),
-(7, 7, 7, '2023-10-07', 1499.60, 'Pendente'),
-(8, 8, 8, '2023-10-08', 1999.50, 'Concluído'),
-(9, 9, 9, '2023-10-09', 2499.40, 'Concluído'),
-(10, 10, 10, '2023-10-10', 2999.30, 'Pendente');
-
--- Inserindo itens nos pedidos
+-- Inserindo pedidos (valor_total começa em 0 e é somado pelos itens)
+INSERT INTO pedido (cliente_id, endereco_id, forma_pagamento_id, data, status) VALUES
+(1, 1, 1, '2023-10-01', 'Concluído'),
+(2, 2, 2, '2023-10-02', 'Concluído'),
+(3, 3, 3, '2023-10-03', 'Pendente'),
+(4, 4, 4, '2023-10-04', 'Concluído'),
+(5, 5, 5, '2023-10-05', 'Cancelado'),
+(6, 6, 6, '2023-10-06', 'Concluído'),
+(7, 7, 7, '2023-10-07', 'Pendente'),
+(8, 8, 8, '2023-10-08', 'Concluído'),
+(9, 9, 9, '2023-10-09', 'Concluído'),
+(10, 10, 10, '2023-10-10', 'Pendente');
+
+-- Inserindo itens nos pedidos (preco_unitario vem de item.preco)
 INSERT INTO item_pedido (pedido_id, item_id, quantidade) VALUES
 -- Pedido 1
 (1, 1, 2),
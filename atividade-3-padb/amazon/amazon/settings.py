@@ -131,3 +131,12 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Sem DEFAULT_PAGINATION_CLASS: cada view escolhe a paginação (pagination_class),
+# e PAGE_SIZE é o tamanho de página padrão para as que escolherem.
+REST_FRAMEWORK = {
+    'PAGE_SIZE': 50,
+}
+# o aviso W001 pede DEFAULT_PAGINATION_CLASS junto com PAGE_SIZE; aqui é proposital
+SILENCED_SYSTEM_CHECKS = ['rest_framework.W001']
+
@@ -6,5 +6,11 @@ class Cliente(models.Model):
     telefone = models.CharField(max_length=15)
     data_cadastro = models.DateTimeField(auto_now_add=True)    
 
+    class Meta:
+        indexes = [
+            # ordem da paginação por cursor (ClientePagination)
+            models.Index(fields=['data_cadastro', 'id'], name='cliente_cadastro_id_idx'),
+        ]
+
     def __str__(self):
         return self.nome
\ No newline at end of file
@@ -0,0 +1,52 @@
+from django.db import connection
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+def estimar_total(queryset):
+    """Total de linhas pelo pg_class.reltuples (atualizado por VACUUM/ANALYZE), sem COUNT(*).
+
+    Só vale para a tabela inteira: com filtro, ou fora do PostgreSQL, retorna None.
+    Também retorna None se a tabela nunca passou por ANALYZE (reltuples = -1).
+    """
+    if connection.vendor != 'postgresql' or queryset.query.where:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [connection.ops.quote_name(queryset.model._meta.db_table)],
+        )
+        linha = cursor.fetchone()
+    if linha is None or linha[0] < 0:
+        return None
+    return linha[0]
+
+
+class CursorComTotalEstimadoPagination(CursorPagination):
+    """Paginação por cursor (keyset): cada página filtra a partir da última linha
+    da anterior em vez de usar OFFSET, então a página 1000 custa o mesmo que a
+    primeira. A ordenação precisa de um índice com as mesmas colunas."""
+    page_size_query_param = 'tamanho'
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.total_estimado = estimar_total(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'total_estimado': self.total_estimado,
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        resposta = super().get_paginated_response_schema(schema)
+        resposta['properties']['total_estimado'] = {'type': 'integer', 'nullable': True, 'example': 123}
+        return resposta
+
+
+class ClientePagination(CursorComTotalEstimadoPagination):
+    # id desempata clientes cadastrados no mesmo instante; índice cliente_cadastro_id_idx
+    ordering = ('data_cadastro', 'id')
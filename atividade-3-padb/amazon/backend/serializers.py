@@ -1,7 +1,58 @@
+from django.db import transaction
 from rest_framework import serializers
 from .models import Cliente
 
+# linhas aceitas por requisição no /clientes/bulk/ e linhas por INSERT
+LIMITE_BULK = 10000
+TAMANHO_LOTE = 1000
+
 class ClienteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Cliente
-        fields = '__all__' 
\ No newline at end of file
+        fields = '__all__'
+
+
+class ClienteBulkListSerializer(serializers.ListSerializer):
+    def validate(self, attrs):
+        # o mesmo email duas vezes no mesmo INSERT ... ON CONFLICT faz o PostgreSQL recusar o lote inteiro
+        linhas = {}
+        for indice, dados in enumerate(attrs):
+            linhas.setdefault(dados['email'], []).append(indice)
+        repetidos = {email: indices for email, indices in linhas.items() if len(indices) > 1}
+        if repetidos:
+            raise serializers.ValidationError(
+                [f'Email repetido na lista: {email} (posições {indices})' for email, indices in repetidos.items()]
+            )
+        return attrs
+
+    def create(self, validated_data):
+        """Insere ou atualiza (pelo email) em lotes, numa única transação"""
+        clientes = [Cliente(**dados) for dados in validated_data]
+        existentes = set()
+        with transaction.atomic():
+            for inicio in range(0, len(clientes), TAMANHO_LOTE):
+                lote = clientes[inicio:inicio + TAMANHO_LOTE]
+                # só para informar criado/atualizado; o upsert em si não depende desta consulta
+                existentes.update(
+                    Cliente.objects.filter(email__in=[c.email for c in lote]).values_list('email', flat=True)
+                )
+                Cliente.objects.bulk_create(
+                    lote,
+                    update_conflicts=True,
+                    unique_fields=['email'],
+                    update_fields=['nome', 'telefone'],
+                )
+        self.resultados = [
+            {'id': c.id, 'email': c.email, 'status': 'atualizado' if c.email in existentes else 'criado'}
+            for c in clientes
+        ]
+        return clientes
+
+
+class ClienteBulkSerializer(ClienteSerializer):
+    """Linha do /clientes/bulk/: email existente atualiza o cliente em vez de dar erro"""
+
+    class Meta(ClienteSerializer.Meta):
+        list_serializer_class = ClienteBulkListSerializer
+        # sem o UniqueValidator, que faria uma consulta por linha e recusaria os emails já cadastrados
+        extra_kwargs = {'email': {'validators': []}}
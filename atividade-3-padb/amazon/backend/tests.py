@@ -1,3 +1,168 @@
-from django.test import TestCase
+import csv
+import io
+import json
+from django.db import connection
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+from .models import Cliente
+from .pagination import ClientePagination
+from .serializers import LIMITE_BULK
+from .views import LINHAS_POR_BLOCO
 
-# Create your tests here.
+
+def _linha(numero, **dados):
+    return {'nome': f'Cliente {numero}', 'email': f'cliente{numero}@exemplo.com', 'telefone': str(numero), **dados}
+
+
+class ClienteBulkTests(APITestCase):
+    url = reverse('cliente-bulk')
+
+    def test_cria_novos_e_atualiza_existentes_pelo_email(self):
+        existente = Cliente.objects.create(**_linha(1))
+        resposta = self.client.post(self.url, [
+            _linha(2),
+            _linha(1, nome='Nome Novo', telefone='999'),
+            _linha(3),
+        ], format='json')
+
+        self.assertEqual(resposta.status_code, status.HTTP_200_OK)
+        dados = resposta.json()
+        self.assertEqual((dados['criados'], dados['atualizados']), (2, 1))
+        self.assertEqual(
+            [(r['email'], r['status']) for r in dados['resultados']],
+            [('cliente2@exemplo.com', 'criado'), ('cliente1@exemplo.com', 'atualizado'),
+             ('cliente3@exemplo.com', 'criado')],
+        )
+        ids = {c.email: c.id for c in Cliente.objects.all()}
+        self.assertEqual(len(ids), 3)
+        self.assertEqual({r['email']: r['id'] for r in dados['resultados']}, ids)
+        self.assertEqual(ids['cliente1@exemplo.com'], existente.id)
+
+        # só nome e telefone são sobrescritos; o cadastro original continua
+        atualizado = Cliente.objects.get(id=existente.id)
+        self.assertEqual((atualizado.nome, atualizado.telefone), ('Nome Novo', '999'))
+        self.assertEqual(atualizado.data_cadastro, existente.data_cadastro)
+
+    def test_email_repetido_na_lista_recusa_tudo(self):
+        resposta = self.client.post(self.url, [_linha(1), _linha(2), _linha(1, nome='Outro')], format='json')
+
+        self.assertEqual(resposta.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('cliente1@exemplo.com', str(resposta.json()))
+        self.assertFalse(Cliente.objects.exists())
+
+    def test_erros_de_validacao_por_linha(self):
+        sem_telefone = _linha(3)
+        del sem_telefone['telefone']
+        resposta = self.client.post(self.url, [_linha(1), _linha(2, email='invalido'), sem_telefone], format='json')
+
+        self.assertEqual(resposta.status_code, status.HTTP_400_BAD_REQUEST)
+        erros = resposta.json()
+        if isinstance(erros, list):
+            # versões antigas do DRF devolvem uma entrada por linha, vazia nas válidas
+            erros = {str(indice): erro for indice, erro in enumerate(erros) if erro}
+        self.assertEqual({indice: list(erro) for indice, erro in erros.items()}, {'1': ['email'], '2': ['telefone']})
+        self.assertFalse(Cliente.objects.exists())
+
+    def test_lista_acima_do_limite(self):
+        resposta = self.client.post(self.url, [_linha(i) for i in range(LIMITE_BULK + 1)], format='json')
+
+        self.assertEqual(resposta.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Cliente.objects.exists())
+
+
+class ClientePaginacaoTests(APITestCase):
+    url = reverse('cliente-list')
+
+    def setUp(self):
+        # tabela recém-truncada volta a reltuples = -1, como se nunca tivesse passado por ANALYZE
+        with connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {Cliente._meta.db_table}')
+        Cliente.objects.bulk_create(Cliente(**_linha(i)) for i in range(23))
+        # metade com o mesmo data_cadastro, para o id desempatar
+        primeiro = Cliente.objects.order_by('id').first()
+        Cliente.objects.filter(id__lte=primeiro.id + 11).update(data_cadastro=primeiro.data_cadastro)
+
+    def _analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Cliente._meta.db_table}')
+
+    def test_percorre_todas_as_paginas_sem_repetir(self):
+        vistos = []
+        url = f'{self.url}?tamanho=5'
+        paginas = 0
+        while url:
+            resposta = self.client.get(url)
+            self.assertEqual(resposta.status_code, status.HTTP_200_OK)
+            dados = resposta.json()
+            self.assertLessEqual(len(dados['results']), 5)
+            vistos += [(c['data_cadastro'], c['id']) for c in dados['results']]
+            url = dados['next']
+            paginas += 1
+
+        self.assertEqual(paginas, 5)
+        self.assertEqual(len(vistos), 23)
+        self.assertEqual(vistos, sorted(vistos))
+        self.assertEqual({cliente_id for _, cliente_id in vistos}, set(Cliente.objects.values_list('id', flat=True)))
+
+    def test_total_estimado_depois_do_analyze(self):
+        self.assertIsNone(self.client.get(self.url).json()['total_estimado'])
+        self._analyze()
+        self.assertEqual(self.client.get(self.url).json()['total_estimado'], 23)
+
+    def test_total_estimado_nulo_com_filtro(self):
+        self._analyze()
+        paginacao = ClientePagination()
+        pagina = paginacao.paginate_queryset(
+            Cliente.objects.filter(nome__startswith='Cliente 1'), Request(APIRequestFactory().get(self.url))
+        )
+        self.assertTrue(pagina)
+        self.assertIsNone(paginacao.get_paginated_response([]).data['total_estimado'])
+
+
+class ClienteExportTests(APITestCase):
+    url = reverse('cliente-export')
+    # mais de um bloco, com o último incompleto
+    quantidade = LINHAS_POR_BLOCO * 2 + 7
+
+    def setUp(self):
+        Cliente.objects.bulk_create(Cliente(**_linha(i)) for i in range(self.quantidade - 1))
+        # vírgula e aspas testam o escape do CSV; o acento, o ensure_ascii=False do JSON
+        self.especial = Cliente.objects.create(**_linha(-1, nome='Conceição, "Ção"'))
+
+    def _exportar(self, formato):
+        resposta = self.client.get(self.url, {'formato': formato})
+        self.assertEqual(resposta.status_code, status.HTTP_200_OK)
+        self.assertTrue(resposta.streaming)
+        return resposta, b''.join(resposta.streaming_content).decode()
+
+    def _detalhe(self, cliente):
+        return self.client.get(reverse('cliente-detail', args=[cliente.id])).json()
+
+    def test_ndjson(self):
+        resposta, conteudo = self._exportar('ndjson')
+
+        self.assertEqual(resposta['Content-Type'], 'application/x-ndjson')
+        self.assertIn('clientes.ndjson', resposta['Content-Disposition'])
+        self.assertIn('Conceição', conteudo)
+        linhas = [json.loads(linha) for linha in conteudo.splitlines()]
+        self.assertEqual(len(linhas), self.quantidade)
+        self.assertEqual([linha['id'] for linha in linhas], list(Cliente.objects.order_by('id').values_list('id', flat=True)))
+        self.assertEqual(linhas[-1], self._detalhe(self.especial))
+
+    def test_csv(self):
+        resposta, conteudo = self._exportar('csv')
+
+        self.assertEqual(resposta['Content-Type'], 'text/csv; charset=utf-8')
+        linhas = list(csv.reader(io.StringIO(conteudo)))
+        self.assertEqual(linhas[0], ['id', 'nome', 'email', 'telefone', 'data_cadastro'])
+        self.assertEqual(len(linhas) - 1, self.quantidade)
+        detalhe = self._detalhe(self.especial)
+        self.assertEqual(linhas[-1], [str(detalhe[nome]) for nome in linhas[0]])
+
+    def test_formato_invalido(self):
+        resposta = self.client.get(self.url, {'formato': 'xml'})
+
+        self.assertEqual(resposta.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('xml', resposta.json()['detail'])
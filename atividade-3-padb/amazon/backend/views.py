@@ -1,8 +1,101 @@
+import csv
+import json
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
-from rest_framework import viewsets
+from rest_framework import serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from .models import Cliente
-from .serializers import ClienteSerializer
+from .pagination import ClientePagination
+from .serializers import ClienteBulkSerializer, ClienteSerializer, LIMITE_BULK
+
+# formato -> Content-Type do /clientes/export/
+FORMATOS_EXPORTACAO = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+# linhas buscadas por vez no cursor do banco e linhas por pedaço enviado
+TAMANHO_LOTE_EXPORTACAO = 2000
+LINHAS_POR_BLOCO = 500
+
+
+class _Eco:
+    """Arquivo falso para o csv.writer: write() devolve a linha em vez de guardar"""
+
+    def write(self, valor):
+        return valor
+
+
+def _linhas_exportacao(queryset, serializer, formato):
+    """Gera o arquivo em blocos de linhas, sem montar a lista inteira em memória"""
+    nomes = list(serializer.fields)
+    # values_list evita criar um objeto do modelo por linha; os campos do serializer
+    # formatam cada valor igual à API (datas em ISO 8601, por exemplo). Texto e
+    # inteiro já saem do banco no formato final e não passam pelo campo.
+    conversores = [
+        None if isinstance(campo, (serializers.CharField, serializers.IntegerField)) else campo.to_representation
+        for campo in serializer.fields.values()
+    ]
+    linhas = queryset.values_list(*nomes).iterator(chunk_size=TAMANHO_LOTE_EXPORTACAO)
+    if formato == 'csv':
+        escritor = csv.writer(_Eco())
+        yield escritor.writerow(nomes)
+        formatar = escritor.writerow
+    else:
+        def formatar(registro):
+            return json.dumps(dict(zip(nomes, registro)), ensure_ascii=False) + '\n'
+
+    # fora de transação o Django abre o cursor do banco WITH HOLD, e o PostgreSQL
+    # materializa o resultado inteiro antes da primeira linha; dentro de uma, as linhas
+    # vêm sob demanda e o arquivo todo sai do mesmo snapshot
+    with transaction.atomic():
+        bloco = []
+        for linha in linhas:
+            bloco.append(formatar([
+                valor if converter is None or valor is None else converter(valor)
+                for converter, valor in zip(conversores, linha)
+            ]))
+            if len(bloco) == LINHAS_POR_BLOCO:
+                yield ''.join(bloco)
+                bloco = []
+        if bloco:
+            yield ''.join(bloco)
+
 
 class ClienteViewSet(viewsets.ModelViewSet):
     queryset = Cliente.objects.all()
-    serializer_class = ClienteSerializer
\ No newline at end of file
+    serializer_class = ClienteSerializer
+    pagination_class = ClientePagination
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """Cria ou atualiza (pelo email) uma lista de clientes de uma vez"""
+        serializer = ClienteBulkSerializer(data=request.data, many=True, allow_empty=False, max_length=LIMITE_BULK)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        resultados = serializer.resultados
+        criados = sum(1 for r in resultados if r['status'] == 'criado')
+        return Response({
+            'criados': criados,
+            'atualizados': len(resultados) - criados,
+            'resultados': resultados,
+        })
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """Exporta todos os clientes em NDJSON (padrão) ou CSV (?formato=csv), em streaming"""
+        # ?format= é do DRF (escolha do renderer), por isso ?formato=
+        formato = request.query_params.get('formato', 'ndjson')
+        if formato not in FORMATOS_EXPORTACAO:
+            return Response(
+                {'detail': f"Formato inválido: {formato}. Use {' ou '.join(FORMATOS_EXPORTACAO)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        queryset = self.filter_queryset(self.get_queryset()).order_by('id')
+        resposta = StreamingHttpResponse(
+            _linhas_exportacao(queryset, self.get_serializer(), formato),
+            content_type=FORMATOS_EXPORTACAO[formato],
+        )
+        resposta['Content-Disposition'] = f'attachment; filename="clientes.{formato}"'
+        return resposta